@@ -12,8 +12,9 @@ from .alerts import L_ERROR, L_NOTICE, L_INFO, L_DEBUG, L_TRACE, \
     alert_config, alert_level, alert_level_name, \
     alert_level_up, alert_level_zero, is_notice, is_info, is_debug, is_trace, \
     debug_vars, fatal, err, notice, info, debug, trace, \
-    tracef, debugf, infof, noticef, errorf, fatalf, temporary_alert_level
-from .fntrace import tracefn
+    tracef, debugf, infof, noticef, errorf, fatalf, temporary_alert_level, \
+    alert_flush
+from .fntrace import tracefn, trace_stats, trace_report
 from .stringreader import StringReader
 from .kvs import parse_kvs
 from .namespace import Namespace
@@ -23,13 +24,17 @@ from .secrets import putsecret, getsecret, getsecret_main, putsecret_main, \
 from .sighandler import sanesighandler, exit_on_error
 from .terminal import ttyi, ttyo, ptty
 from .capture import outputCaptured, outputAndExitCaptured, inputFrom
-from .process import backquote, system
+from .process import backquote, backquote_async, backquote_many, \
+     backquote_lines, backquote_batch, backquote_completed, BatchError, \
+     ShellWorker, shell_worker, pipeline, system
 from .assorted import boolish, flatten, is_sequence, identity
 from .numeric import maybe_int, is_int, maybe_num, is_num, \
      avg_midrange, remove_outliers
-from .iohelper import all_input_lines, read_items, read_mapping
-from .time import isotime, isotime_ms, iso_time, iso_time_ms, iso_time_us
-from .table import format_table
+from .iohelper import all_input_lines, read_items, read_mapping, \
+     MappingFile, cached_mapping, read_item_chunks
+from .time import isotime, isotime_ms, iso_time, iso_time_ms, iso_time_us, \
+     CachedTimeFormatter
+from .table import format_table, print_table
 from .singleton import Singleton
 from .multiset import Multiset
 
@@ -53,10 +58,15 @@ __all__ = sorted("""pgetopts L_ERROR L_NOTICE L_INFO L_DEBUG L_TRACE
   alert_level_up alert_level_zero is_notice is_info is_debug is_trace
   debug_vars fatal err notice info debug trace
   tracef debugf infof noticef errorf fatalf temporary_alert_level
-  tracefn StringReader parse_kvs Namespace Config putsecret getsecret
+  alert_flush
+  tracefn trace_stats trace_report StringReader parse_kvs Namespace Config putsecret getsecret
   getsecret_main putsecret_main FileModeError sanesighandler ttyi ttyo
-  ptty outputCaptured outputAndExitCaptured inputFrom backquote boolish
+  ptty outputCaptured outputAndExitCaptured inputFrom backquote
+  backquote_async backquote_many backquote_batch backquote_completed
+  BatchError backquote_lines ShellWorker shell_worker pipeline boolish
   flatten is_sequence identity maybe_int is_int maybe_num is_num
-  avg_midrange remove_outliers all_input_lines read_items isotime
-  isotime_ms iso_time iso_time_ms iso_time_us format_table Singleton
-  Multiset version program real_home home""".split())
+  avg_midrange remove_outliers all_input_lines read_items read_mapping
+  MappingFile cached_mapping read_item_chunks isotime
+  isotime_ms iso_time iso_time_ms iso_time_us CachedTimeFormatter
+  format_table print_table
+  Singleton Multiset version program real_home home""".split())
@@ -70,24 +70,116 @@ like this:
         # maximum alert level
         max_level=4,
 
-        # print timestamps with messages
+        # print timestamps with messages (false, true, "monotonic", or a
+        # function)
         timestamps=False,
 
         # had any errors yet?
         had_errors=False,
+
+        # write alerts in a background thread
+        background=False,
+
+        # maximum number of alerts waiting for the background thread
+        queue_size=1000,
+
+        # what to do with an alert if the queue is full: "block" until
+        # there is space, "drop" the alert, or "drop_oldest" alert queued
+        overflow="block",
+
+        # number of alerts dropped (or failed to write) in background mode
+        alerts_dropped=0,
+
+        # bind the alert functions of disabled levels to a no-op function
+        prebind=False,
+
+        # output format: "text", or "json" or "logfmt" for structured records
+        record_format="text",
+
+        # number of alerts collected before they are written together
+        batch_size=1,
+
+        # maximum number of seconds collected alerts wait to be written
+        batch_interval=None,
+
+        # maximum number of repeated alerts written per window (or None)
+        rate_limit=None,
+
+        # length of the rate limiting window in seconds
+        rate_window=1,
+
+        # repeated alerts have the same "message" or call "site"
+        rate_key="message",
     )
 
+With `rate_limit`, at most that many repeated alerts are written in
+each window of `rate_window` seconds; alerts are repeated if they have
+the same level and either the same `message` text or the same call
+`site`, depending on `rate_key`. When a repeated alert is written again
+in a later window, or by `alert_flush()` at the latest, the last
+suppressed one is written once with "(repeated N more times)" appended.
+Only the `rate_entries_max` (1000) most recently used keys are kept; when
+one is dropped, its suppressed alerts are reported as repeated, too.
+
+With `timestamps` true, alerts begin with the time as from `isotime()`,
+formatted by a `CachedTimeFormatter`; with "monotonic", the time is taken
+from the monotonic clock.
+
+A structured record has the fields `time` (the timestamp from the
+`timestamps` function, or an ISO 8601 time with milliseconds), `level` (the
+level name, e.g. `L_INFO`), `program`, and `message`; the message
+decorations are not used.
+
+If `batch_size` is greater than one, alerts are collected and written when
+there are `batch_size` of them or the first has waited for `batch_interval`
+seconds (if set), with one write per channel. Without background mode, this
+is checked only when alerts are written, so the last ones may wait until
+`alert_flush()` is called, or the program exits. syslog messages are not
+collected.
+
+In background mode, alerts are formatted by the calling thread and put into
+a queue, from which a separate thread writes them. `alert_flush()` waits
+until all queued alerts are written; this is done at program exit and by
+`fatal()`, too.
+
+With `prebind`, changes of the alert level rebind the names of the alert
+functions of the levels above (e.g. `debug`, `debugf`, `dbg`, `debug_vars`
+for `L_DEBUG`) in this module and in the `jpylib` package to a function
+that does nothing, and back to the real ones when the levels are enabled.
+Calling a disabled alert function through these names then costs hardly
+more than an empty function call. (Names imported from the module elsewhere,
+as with `from jpylib import debug`, are not rebound, though.) Functions
+decorated with `tracefn` are left undecorated if tracing is not enabled at
+that time.
+
+The decorations and output channels are prepared when the configuration is
+changed with `alert_config()` or `alert_redirect()`; changes made directly
+to the configuration object take effect with the next call of these.
+
+The level set with `temporary_alert_level()` is in effect only for the current
+thread or asyncio task; within it, `alert_level()` and `alert_level_up()` get
+and set that level, too. Alerts are written to a channel that has a file
+descriptor with one `os.write()` per line (or batch), so lines written by
+concurrent threads or forked processes do not mix.
 
 """
 
 import os
 import sys
+import json
+import time
+import queue
+import atexit
 import syslog
 import inspect
+import threading
+import contextvars
+from collections import OrderedDict
 from contextlib import contextmanager
 
 import jpylib as y
 from .config import Config
+from .time import CachedTimeFormatter
 
 # properties of the alert levels; the decoration will be formatted with the
 # locals() values
@@ -107,14 +199,274 @@ for i, props in enumerate(alert_levels):
 # the module configuration; will be initialised in alert_init()
 cfg = None
 
+# overflow policies for the alert queue in background mode
+overflow_policies = ("block", "drop", "drop_oldest")
+
+# formats for the alert output
+record_formats = ("text", "json", "logfmt")
+
+# what repeated alerts are recognised by for rate limiting
+rate_keys = ("message", "site")
+
+# number of rate limiting entries kept; the least recently used one is
+# dropped to make room for a new one
+rate_entries_max = 1000
+
+# the queue of alerts and the thread writing them in background mode, and
+# the lock for starting and stopping the thread
+_alert_queue = None
+_alert_writer = None
+_writer_lock = threading.Lock()
+
+# alerts collected to be written in a batch: lines per channel, the number
+# of lines, and the time.monotonic() of the first
+_batch = {}
+_batch_count = 0
+_batch_start = None
+_batch_lock = threading.Lock()
+
+def _write_line(channel, text):
+    """Write `text` to `channel`, with a single os.write() if it has a file
+    descriptor, so lines from different threads and processes do not mix.
+    """
+    try:
+        fd = channel.fileno()
+    except (AttributeError, OSError, ValueError):
+        channel.write(text)
+        channel.flush()
+        return
+    channel.flush()
+    data = text.encode(getattr(channel, "encoding", None) or "utf-8",
+                       getattr(channel, "errors", None) or "strict")
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def _flush_batch():
+    """Write the collected alerts."""
+    global _batch_count, _batch_start
+    with _batch_lock:
+        for channel, lines in _batch.items():
+            _write_line(channel, "".join(lines))
+        _batch.clear()
+        _batch_count = 0
+        _batch_start = None
+
+
+def _batch_timeout():
+    """Return the seconds until the collected alerts are due, or None."""
+    if _batch_start is None or not cfg.batch_interval:
+        return None
+    return max(0, _batch_start + cfg.batch_interval - time.monotonic())
+
+
+def _write_alert(channel, msgtext, syslog_prio, sysmsg):
+    """Write an alert to `channel` and, if `syslog_prio`, to syslog."""
+    global _batch_count, _batch_start
+    if cfg.batch_size > 1:
+        with _batch_lock:
+            _batch.setdefault(channel, []).append(msgtext + "\n")
+            _batch_count += 1
+            if _batch_start is None:
+                _batch_start = time.monotonic()
+        if _batch_count >= cfg.batch_size or _batch_timeout() == 0:
+            _flush_batch()
+    else:
+        _write_line(channel, msgtext + "\n")
+    if syslog_prio:
+        if not cfg.syslog_opened:
+            syslog.openlog(logoption=syslog.LOG_PID,
+                           facility=cfg.syslog_facility)
+            cfg.syslog_opened = True
+        syslog.syslog(syslog_prio, sysmsg)
+
+
+def _write_alerts(alerts):
+    """Write the alerts from queue `alerts` (run by the writer thread)."""
+    while True:
+        try:
+            alert = alerts.get(timeout=_batch_timeout())
+        except queue.Empty:
+            _flush_batch()
+            continue
+        try:
+            if alert is None:
+                return
+            _write_alert(*alert)
+        except Exception:
+            cfg.alerts_dropped += 1
+        finally:
+            alerts.task_done()
+
+
+def _queue_alert(alert):
+    """Put `alert` into the queue for the writer thread, starting it if needed.
+    """
+    global _alert_queue, _alert_writer
+    alert_queue = _alert_queue
+    if alert_queue is None:
+        with _writer_lock:
+            if _alert_queue is None:
+                _alert_queue = queue.Queue(cfg.queue_size)
+                _alert_writer = threading.Thread(target=_write_alerts,
+                                                 args=(_alert_queue,),
+                                                 name="alert writer",
+                                                 daemon=True)
+                _alert_writer.start()
+            alert_queue = _alert_queue
+    if cfg.overflow == "block":
+        alert_queue.put(alert)
+        return
+    while True:
+        try:
+            alert_queue.put_nowait(alert)
+            return
+        except queue.Full:
+            cfg.alerts_dropped += 1
+            if cfg.overflow == "drop":
+                return
+        try:
+            alert_queue.get_nowait()
+            alert_queue.task_done()
+        except queue.Empty:
+            pass
+
+
+def _stop_writer():
+    """Write all queued alerts and end the writer thread."""
+    global _alert_queue, _alert_writer
+    with _writer_lock:
+        _alert_queue.put(None)
+        _alert_writer.join()
+        _alert_queue = _alert_writer = None
+
+
+def _after_fork_in_child():
+    """Forget the writer thread, its queue, and the collected alerts, and
+    renew the locks (in a forked child process).
+    """
+    global _alert_queue, _alert_writer, _writer_lock, _batch_lock, \
+        _batch_count, _batch_start, _rate_lock, _overrides_lock, _overrides
+    _alert_queue = _alert_writer = None
+    _writer_lock = threading.Lock()
+    _batch_lock = threading.Lock()
+    _batch.clear()
+    _batch_count = 0
+    _batch_start = None
+    _rate_lock = threading.Lock()
+    _rate_state.clear()
+    _overrides_lock = threading.Lock()
+    # only the overrides of the forking thread (or task) are still in effect
+    override = _context_level.get()
+    _overrides = override[1] if override else 0
+    _rebind()
+
+
+# rate limiting state: key => [start of window, number of alerts in window,
+# number of alerts suppressed, msgs of the last suppressed alert], least
+# recently used first
+_rate_state = OrderedDict()
+_rate_lock = threading.Lock()
+
+def _rate_key(level):
+    """Return the rate limiting key for an alert from the calling site."""
+    frame = sys._getframe(1)
+    while frame.f_back and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    return (level, frame.f_code.co_filename, frame.f_lineno)
+
+
+def _rate_check(key, msgs):
+    """Count an alert for rate limiting; return if it is to be suppressed.
+
+    Also return a list of (level, msgs) of "repeated" alerts to be written
+    first: for `key`, if the alert begins a new window after alerts were
+    suppressed in the previous one, and for the entry dropped to make room
+    for a new `key`, if alerts were suppressed for it.
+
+    """
+    now = time.monotonic()
+    repeated = []
+    with _rate_lock:
+        state = _rate_state.get(key)
+        if state:
+            _rate_state.move_to_end(key)
+            if now - state[0] < cfg.rate_window:
+                state[1] += 1
+                if state[1] <= cfg.rate_limit:
+                    return False, repeated
+                state[2] += 1
+                state[3] = msgs
+                return True, repeated
+            if state[2]:
+                repeated.append((key[0], _repeated(state)))
+        elif len(_rate_state) >= rate_entries_max:
+            old_key, old_state = _rate_state.popitem(last=False)
+            if old_state[2]:
+                repeated.append((old_key[0], _repeated(old_state)))
+        _rate_state[key] = [now, 1, 0, None]
+        return False, repeated
+
+
+def _repeated(state):
+    """Return the msgs of a "repeated" alert for the rate limiting `state`."""
+    return [*(elem() if callable(elem) else str(elem) for elem in state[3]),
+            "(repeated {} more times)".format(state[2])]
+
+
+def _flush_repeats():
+    """Write the "repeated" alerts for all suppressed alerts."""
+    with _rate_lock:
+        repeats = [(key[0], _repeated(state))
+                   for key, state in _rate_state.items() if state[2]]
+        _rate_state.clear()
+    for level, msgs in repeats:
+        _emit(level, msgs)
+
+
+def alert_flush():
+    """Write all alerts queued in background mode or collected for a batch.
+
+    Alerts suppressed by rate limiting are reported as repeated.
+    """
+    if _rate_state:
+        _flush_repeats()
+    if _alert_queue:
+        _alert_queue.join()
+    if _batch:
+        _flush_batch()
+
+
+atexit.register(alert_flush)
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 def alert_config(*, decoration=None, fd=None, level=None, program=None,
                  syslog_facility=None, syslog_prio=None, reset_defaults=None,
-                 timestamps=None, fatal_label="(fatal)"):
+                 timestamps=None, fatal_label="(fatal)", background=None,
+                 queue_size=None, overflow=None, prebind=None,
+                 record_format=None, batch_size=None, batch_interval=None,
+                 rate_limit=None, rate_window=None, rate_key=None):
     """Customise the alerts configuration with the given values.
 
     If `reset_defaults` is true, reset everything to the specified or
     default values.
+
+    If `background` is true, alerts are written by a separate thread; see
+    the module documentation for `queue_size` and `overflow`, and also for
+    `prebind`, `record_format`, `batch_size`, and `batch_interval`, and the
+    rate limiting with `rate_limit`, `rate_window`, and `rate_key`.
     """
+    if overflow is not None and overflow not in overflow_policies:
+        raise ValueError("alert queue overflow policy not in {}: {}"
+                         .format(overflow_policies, repr(overflow)))
+    if record_format is not None and record_format not in record_formats:
+        raise ValueError("alert record format not in {}: {}"
+                         .format(record_formats, repr(record_format)))
+    if rate_key is not None and rate_key not in rate_keys:
+        raise ValueError("alert rate limiting key not in {}: {}"
+                         .format(rate_keys, repr(rate_key)))
+    alert_flush()
     global cfg
     if not any(locals().values()) or reset_defaults:
         cfg = Config(
@@ -148,7 +500,8 @@ def alert_config(*, decoration=None, fd=None, level=None, program=None,
             # maximum alert level
             max_level=len(alert_levels)-1,
 
-            # print timestamps with messages
+            # print timestamps with messages (false, true, "monotonic", or
+            # a function)
             timestamps=False,
 
             # print "Fatal" label for fatal errors
@@ -156,13 +509,116 @@ def alert_config(*, decoration=None, fd=None, level=None, program=None,
 
             # had any errors yet?
             had_errors=False,
+
+            # write alerts in a background thread
+            background=False,
+
+            # maximum number of alerts waiting for the background thread
+            queue_size=1000,
+
+            # what to do with an alert if the queue is full
+            overflow="block",
+
+            # number of alerts dropped (or failed to write) in background mode
+            alerts_dropped=0,
+
+            # bind the alert functions of disabled levels to a no-op function
+            prebind=False,
+
+            # output format: "text", or "json" or "logfmt" for structured
+            # records
+            record_format="text",
+
+            # number of alerts collected before they are written together
+            batch_size=1,
+
+            # maximum number of seconds collected alerts wait to be written
+            batch_interval=None,
+
+            # maximum number of repeated alerts written per window (or None)
+            rate_limit=None,
+
+            # length of the rate limiting window in seconds
+            rate_window=1,
+
+            # repeated alerts have the same "message" or call "site"
+            rate_key="message",
         )
     del reset_defaults
     for var, value in locals().items():
         if value is not None:
             cfg.set(var, value)
-    if cfg.timestamps is True:
-        cfg.timestamps = y.isotime
+    if cfg.timestamps is True or cfg.timestamps == "monotonic":
+        cfg.timestamps = CachedTimeFormatter(
+            "%Y%m%d:%H%M%S", monotonic=cfg.timestamps == "monotonic")
+    if _alert_queue and (not cfg.background
+                        or _alert_queue.maxsize != cfg.queue_size):
+        _stop_writer()
+    _prepare_output()
+    _rebind()
+
+# per level: the rendered decoration, the name of the sys module's stream
+# (looked up for each alert to make output capturing work), or the channel
+_level_output = []
+
+def _prepare_output():
+    """Prepare the decorations and channels of the alert levels."""
+    _level_output[:] = []
+    for level in range(cfg.max_level + 1):
+        decoration = cfg.decoration[level]
+        if decoration:
+            decoration = decoration.format(**globals())
+        channel = cfg.fd[level]
+        stream_name = { 1: "stdout", 2: "stderr" }.get(channel)
+        _level_output.append((decoration, stream_name, channel))
+
+
+def _no_alert(*args):
+    """Do nothing, for a disabled alert function (see `prebind`)."""
+    pass
+
+
+# the names of the alert functions per level, as rebound with `prebind`
+level_functions = (
+    (L_NOTICE, ("notice", "noticef")),
+    (L_INFO, ("info", "infof")),
+    (L_DEBUG, ("debug", "dbg", "debugf", "debug_vars")),
+    (L_TRACE, ("trace", "tracef")),
+)
+
+# the real alert functions by name; filled at the end of the module
+_alert_functions = {}
+
+# the alert level set by temporary_alert_level() for the current thread or
+# asyncio task and the nesting depth of these, as (level, depth) (or None),
+# and the number of them in effect in all threads
+_context_level = contextvars.ContextVar("alert_level", default=None)
+_overrides = 0
+_overrides_lock = threading.Lock()
+
+def _level():
+    """Return the alert level in effect for the current thread or task."""
+    if _overrides:
+        override = _context_level.get()
+        if override is not None:
+            return override[0]
+    return cfg.level
+
+
+def _rebind():
+    """Bind the alert function names as is appropriate for `prebind`."""
+    if not _alert_functions:
+        return                          # still initialising the module
+    package = getattr(sys.modules.get("jpylib"), "__dict__", {})
+    for level, names in level_functions:
+        for name in names:
+            func = _alert_functions[name]
+            if cfg.prebind and level > cfg.level and not _overrides:
+                func = _no_alert
+            globals()[name] = func
+            if package.get(name) in (_alert_functions[name], _no_alert):
+                package[name] = func
+
 
 def alert_init(**kwargs):
     """Initialise the module to default or given values."""
@@ -174,16 +630,26 @@ alert_init()
 def alert_redirect(level, file):
     """Redirect printing of alerts from `level` to `file` (a file handle)."""
     cfg.fd[level] = file
+    _prepare_output()
 
 
 def alert_level(level=None):
     """Get and/or set the verbosity level for the alert functions.
+
+    Within `temporary_alert_level()`, this is the level of the current thread
+    or asyncio task, otherwise the global one.
     """
     if level is not None:
         if type(level) is str:
             level = globals()[level]
-        cfg.level = max(0, min(level, cfg.max_level))
-    return cfg.level
+        level = max(0, min(level, cfg.max_level))
+        override = _context_level.get()
+        if override is None:
+            cfg.level = level
+            _rebind()
+        else:
+            _context_level.set((level, override[1]))
+    return _level()
 
 def alcf():
     """Return the alerts configuration (used for testing)."""
@@ -192,7 +658,7 @@ def alcf():
 def alert_level_name(level=None):
     """Return the name of the specified (or current) level number."""
     if level is None:
-        level = cfg.level
+        level = _level()
     return alert_levels[level][0]
 
 
@@ -203,9 +669,7 @@ def alert_level_up():
     `pgetopts` option to increase the verbosity. Returns the new level.
 
     """
-    if cfg.level < cfg.max_level:
-        cfg.level += 1
-    return cfg.level
+    return alert_level(_level() + 1)
 
 
 def alert_level_zero():
@@ -215,36 +679,78 @@ def alert_level_zero():
     `pgetopts` option to set the verbosity to zero. Returns the new level.
 
     """
-    cfg.level = 0
-    return cfg.level
+    return alert_level(0)
 
 
 def is_notice():
     """Return `True` iff the alert level is at least at `L_NOTICE`."""
-    return cfg.level >= L_NOTICE
+    return _level() >= L_NOTICE
 
 def is_info():
     """Return `True` iff the alert level is at least at `L_INFO`."""
-    return cfg.level >= L_INFO
+    return _level() >= L_INFO
 
 def is_debug():
     """Return `True` iff the alert level is at least at `L_DEBUG`."""
-    return cfg.level >= L_DEBUG
+    return _level() >= L_DEBUG
 
 def is_trace():
     """Return `True` iff the alert level is at least at `L_TRACE`."""
-    return cfg.level >= L_TRACE
+    return _level() >= L_TRACE
 
 
 @contextmanager
 def temporary_alert_level(level):
-    """Context manager to temporarily raise the alert level."""
-    savedLevel = alert_level()
-    alert_level(level)
+    """Context manager to temporarily set the alert level.
+
+    The level is in effect only for the current thread or asyncio task.
+    """
+    global _overrides
+    if type(level) is str:
+        level = globals()[level]
+    override = _context_level.get()
+    token = _context_level.set((max(0, min(level, cfg.max_level)),
+                                override[1] + 1 if override else 1))
+    with _overrides_lock:
+        _overrides += 1
+        if _overrides == 1:
+            _rebind()
     try:
         yield
     finally:
-        alert_level(savedLevel)
+        _context_level.reset(token)
+        with _overrides_lock:
+            _overrides -= 1
+            if not _overrides:
+                _rebind()
+
+
+def _logfmt_value(value):
+    """Return `value` (a string) as a logfmt value, quoted if necessary."""
+    if value and value.isprintable() \
+       and not any(ch in value for ch in " =\"\\"):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+# the timestamps of structured records without a `timestamps` function
+_record_time = CachedTimeFormatter("%Y-%m-%dT%H:%M:%S", 3)
+
+def _record(level, message, timestamp):
+    """Return a structured record of the alert `message` at `level`.
+
+    `timestamp` is from the `timestamps` function, or None.
+    """
+    record = {
+        "time": timestamp or _record_time(),
+        "level": alert_levels[level][0],
+        "program": cfg.program,
+        "message": message,
+    }
+    if cfg.record_format == "json":
+        return json.dumps(record, ensure_ascii=False)
+    return " ".join("{}={}".format(key, _logfmt_value(value))
+                    for key, value in record.items())
 
 
 def alert_if_level(level, *msgs):
@@ -263,37 +769,57 @@ def alert_if_level(level, *msgs):
     convenience functions `debug()`, `info()`, etc. It is not intended to be
     called directly by the user.
 
+    In background mode, the message is written by a separate thread. With
+    `rate_limit` configured, repeated alerts may be suppressed.
+
     """
     # return fast if not needed
-    if level > cfg.level:
+    if level > (_level() if _overrides else cfg.level):
         return
 
-    # make all msgs elements strings, calling those that are callable
-    msgs = list(msgs)                   # is a tuple before
-    for i, elem in enumerate(msgs):
-        if callable(elem):
-            msgs[i] = elem()
-        else:
-            msgs[i] = str(elem)
-    if cfg.decoration[level]:
-        msgs = [cfg.decoration[level].format(**globals()), *msgs]
-    if cfg.timestamps:
-        msgs.insert(0, cfg.timestamps())
-
-    channel = cfg.fd[level]
-    channel = { 1: sys.stdout, 2: sys.stderr }.get(channel) or channel
-
-    msgtext = " ".join(msgs).rstrip()
-    print(msgtext, file=channel, flush=True)
+    if cfg.rate_limit and cfg.rate_key == "site":
+        suppress, repeated = _rate_check(_rate_key(level), msgs)
+        if suppress:
+            return
 
+    # make all msgs elements strings, calling those that are callable
+    msgs = [elem() if callable(elem) else str(elem) for elem in msgs]
+    if cfg.rate_limit:
+        if cfg.rate_key == "message":
+            suppress, repeated = _rate_check((level, " ".join(msgs)), msgs)
+            if suppress:
+                return
+        for repeated_level, repeated_msgs in repeated:
+            _emit(repeated_level, repeated_msgs)
+    _emit(level, msgs)
+
+
+def _emit(level, msgs):
+    """Write an alert with `msgs` (strings) at `level`."""
+    decoration, stream_name, channel = _level_output[level]
+    timestamp = cfg.timestamps() if cfg.timestamps else None
+    record = None
+    if cfg.record_format != "text":
+        record = _record(level, " ".join(msgs).rstrip(), timestamp)
+    if decoration:
+        msgs = [decoration, *msgs]
+    if timestamp:
+        msgs.insert(0, timestamp)
+    if stream_name:
+        channel = getattr(sys, stream_name)
+
+    msgtext = record or " ".join(msgs).rstrip()
+    syslog_prio = None
+    sysmsg = None
     if cfg.syslog_facility and cfg.syslog_prio[level]:
-        if not cfg.syslog_opened:
-            syslog.openlog(logoption=syslog.LOG_PID,
-                           facility=cfg.syslog_facility)
-            cfg.syslog_opened = True
         level = max(0, min(cfg.max_level, level))
-        message = " ".join(map(str, msgs))
-        syslog.syslog(cfg.syslog_prio[level], message)
+        syslog_prio = cfg.syslog_prio[level]
+        sysmsg = " ".join(map(str, msgs))
+
+    if cfg.background:
+        _queue_alert((channel, msgtext, syslog_prio, sysmsg))
+    else:
+        _write_alert(channel, msgtext, syslog_prio, sysmsg)
 
 
 def debug_vars(*vars):
@@ -302,7 +828,7 @@ def debug_vars(*vars):
     The arguments are the variable names (strings). Each variable will be
     printed as a debug message with its name and value on a separate line.
     """
-    if cfg.level >= L_DEBUG:
+    if cfg.level >= L_DEBUG or _overrides:
         context = inspect.currentframe().f_back.f_locals
         for var in vars:
             debug("VAR {}: {}".format(var, repr(context[var])))
@@ -328,6 +854,7 @@ def fatal(*msgs, exit_status=1):
         alert_if_level(L_ERROR, cfg.fatal_label, *msgs)
     else:
         alert_if_level(L_ERROR, *msgs)
+    alert_flush()
     sys.exit(exit_status)
 
 def fatalf(template, *args, exit_status=1):
@@ -339,31 +866,34 @@ def fatalf(template, *args, exit_status=1):
 
 def notice(*msgs):
     """Print `L_NOTICE` level output."""
-    alert_if_level(L_NOTICE, *msgs)
+    if cfg.level >= L_NOTICE or _overrides:
+        alert_if_level(L_NOTICE, *msgs)
 
 def noticef(template, *args):
     """Print `L_NOTICE` level output as a formatted string.
 
     `template` is the format template, `args` are its arguments.
     """
-    if is_notice():
+    if cfg.level >= L_NOTICE or _overrides:
         alert_if_level(L_NOTICE, template.format(*args))
 
 def info(*msgs):
     """Print `L_INFO` level output."""
-    alert_if_level(L_INFO, *msgs)
+    if cfg.level >= L_INFO or _overrides:
+        alert_if_level(L_INFO, *msgs)
 
 def infof(template, *args):
     """Print `L_INFO` level output as a formatted string.
 
     `template` is the format template, `args` are its arguments.
     """
-    if is_info():
-        info(template.format(*args))
+    if cfg.level >= L_INFO or _overrides:
+        alert_if_level(L_INFO, template.format(*args))
 
 def debug(*msgs):
     """Print `L_DEBUG` level output."""
-    alert_if_level(L_DEBUG, *msgs)
+    if cfg.level >= L_DEBUG or _overrides:
+        alert_if_level(L_DEBUG, *msgs)
 dbg = debug                             # alias
 
 def debugf(template, *args):
@@ -371,19 +901,25 @@ def debugf(template, *args):
 
     `template` is the format template, `args` are its arguments.
     """
-    if is_debug():
-        debug(template.format(*args))
+    if cfg.level >= L_DEBUG or _overrides:
+        alert_if_level(L_DEBUG, template.format(*args))
 
 def trace(*msgs):
     """Print `L_TRACE` level output."""
-    alert_if_level(L_TRACE, *msgs)
+    if cfg.level >= L_TRACE or _overrides:
+        alert_if_level(L_TRACE, *msgs)
 
 def tracef(template, *args):
     """Print `L_TRACE` level output as a formatted string.
 
     `template` is the format template, `args` are its arguments.
     """
-    if is_trace():
-        trace(template.format(*args))
+    if cfg.level >= L_TRACE or _overrides:
+        alert_if_level(L_TRACE, template.format(*args))
+
+_alert_functions.update((name, globals()[name])
+                        for level, names in level_functions
+                        for name in names)
+_rebind()
 
 # EOF
@@ -1,17 +1,145 @@
 #!/usr/bin/env python3
 
+import sys
+import itertools
+import threading
+from time import perf_counter
+
 from jpylib import is_trace, trace
+from . import alerts
+from .namespace import Namespace
+from .table import format_table
+
+# per-thread call statistics: function name => [calls, cumulative time, own
+# time, active calls], and the stack of the time spent in callees
+_local = threading.local()
+
+# the call statistics tables of the threads, as (thread, table), and the
+# table of the threads that have ended, summed up
+_thread_stats = []
+_ended_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _merge(into, table):
+    """Add the call statistics of `table` to those of `into`."""
+    for name, (calls, cumulative, own, _) in list(table.items()):
+        entry = into.get(name)
+        if entry is None:
+            into[name] = [calls, cumulative, own, 0]
+        else:
+            entry[0] += calls
+            entry[1] += cumulative
+            entry[2] += own
+
+
+def _prune():
+    """Move the tables of ended threads to `_ended_stats` (lock held)."""
+    alive = []
+    for thread, table in _thread_stats:
+        if thread.is_alive():
+            alive.append((thread, table))
+        else:
+            _merge(_ended_stats, table)
+    _thread_stats[:] = alive
+
+
+def _thread_init():
+    """Initialise the call statistics of the current thread."""
+    _local.stats = {}
+    _local.stack = []
+    with _stats_lock:
+        _prune()
+        _thread_stats.append((threading.current_thread(), _local.stats))
+    return _local.stats, _local.stack
+
 
-def tracefn(func):
+def tracefn(func=None, *, stats=False, sample=0):
     """Decorator: trace function's calls if alert level is `L_TRACE` or higher.
+
+    With `sample` N greater than zero, only every Nth call is traced. With
+    `stats`, the number of calls and the cumulative and own (without the
+    callees decorated with `stats`) wall time are recorded for
+    `trace_stats()`. Used as `@tracefn(stats=True, sample=100)`, or as
+    `@tracefn` without arguments.
+
+    With the alerts `prebind` configuration, return `func` undecorated if the
+    alert level is lower than `L_TRACE` at this time and `stats` is false.
     """
+    if func is None:
+        return lambda func: tracefn(func, stats=stats, sample=sample)
+    if alerts.cfg.prebind and not is_trace() and not stats:
+        return func
+    name = func.__qualname__
+    if func.__module__ != "__main__":
+        name = "{}.{}".format(func.__module__, name)
+    calls = itertools.count()
     def wrapper(*args, **kwargs):
-        if is_trace():
+        if is_trace() and (not sample or next(calls) % sample == 0):
             s = "call {}({}".format(func.__name__, ', '.join(map(repr, args)))
             if kwargs:
                 for k, v in kwargs.items():
                     s += ", {}={}".format(k, repr(v))
             trace(s + ")")
-        return func(*args, **kwargs)
+        if not stats:
+            return func(*args, **kwargs)
+        try:
+            table, stack = _local.stats, _local.stack
+        except AttributeError:
+            table, stack = _thread_init()
+        entry = table.get(name)
+        if entry is None:
+            entry = table[name] = [0, 0.0, 0.0, 0]
+        entry[0] += 1
+        entry[3] += 1
+        stack.append(0.0)
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            entry[3] -= 1
+            if not entry[3]:            # count recursive calls only once
+                entry[1] += elapsed
+            entry[2] += elapsed - stack.pop()
+            if stack:
+                stack[-1] += elapsed
     return wrapper
 
+
+def trace_stats(reset=False):
+    """Return the call statistics of the functions decorated with `stats`.
+
+    The result is a dict of function names to Namespaces with `calls`,
+    `cumulative`, and `own` (time in seconds), summed over all threads. With
+    `reset`, the statistics are cleared.
+    """
+    totals = {}
+    with _stats_lock:
+        _prune()
+        _merge(totals, _ended_stats)
+        for thread, table in _thread_stats:
+            _merge(totals, table)
+            if reset:
+                table.clear()
+        if reset:
+            _ended_stats.clear()
+    return { name: Namespace(calls=calls, cumulative=cumulative, own=own)
+             for name, (calls, cumulative, own, _) in totals.items() }
+
+
+def trace_report(file=None, sort="cumulative", reset=False):
+    """Print a table of the call statistics to `file` (default: stdout).
+
+    The times are in seconds, but per call in microseconds. The functions are
+    sorted by `sort` (descending), which may be "calls", "cumulative", or
+    "own"; `reset` is as for `trace_stats()`.
+    """
+    stats = trace_stats(reset=reset)
+    rows = [("function", "calls", "cumulative", "own", "us/call")]
+    for name, ns in sorted(stats.items(), key=lambda item: item[1][sort],
+                           reverse=True):
+        rows.append((name, ns.calls, "{:.6f}".format(ns.cumulative),
+                     "{:.6f}".format(ns.own),
+                     "{:.3f}".format(ns.cumulative / ns.calls * 1e6)))
+    print(format_table(rows, align="l,lr*"), file=file or sys.stdout)
@@ -1,34 +1,249 @@
 # Part of jpylib: read lines/items from one or more files. Skip empty and
 # commented lines (matching /^\s*#/), strip leading and trailing blanks.
 
+import io
 import os
 import sys
 import re
-from .assorted import identity
+import bz2
+import itertools
+import gzip
+import lzma
+import mmap
+import stat
+import time
+import array
+import queue
+import locale
+import hashlib
+import threading
+import collections
+import contextlib
+import concurrent.futures
+from .assorted import is_sequence
+
+# buffer size for reading files in binary mode
+binary_bufsize = 1024 * 1024
+
+# number of decompressed chunks a decompression thread may read ahead
+decompress_ahead = 8
 
 def read_mapping(fname, sep=None, skip_fails=False, comments_re="^\\s*#",
-                 ign_fnf=False):
+                 ign_fnf=False, binary=False, encoding=None, errors=None):
     """Read a key/value mapping from `fname`.
 
     The input are lines of the form "key value", with key and value
     separated by `sep` or whitespace. Comment and empty lines are skipped
-    as per the behaviour of `read_items()`.
+    as per the behaviour of `read_items()`. With `binary`, keys and values
+    are bytes; `encoding` and `errors` are as for `all_input_lines()`.
     """
+    if binary and isinstance(sep, str):
+        sep = sep.encode()
     result = {}
-    for line in read_items(fname, comments_re=comments_re, ign_fnf=ign_fnf):
-        key, *rest = line.split(sep, 1)
-        if len(rest) == 1:
-            value = rest[0]
-        elif skip_fails:
-            continue
-        else:
-            raise ValueError(f"{fname}:{line}: "
-                             + "key/value line has only one field")
-        result[key] = value
+    for line in read_items(fname, comments_re=comments_re, ign_fnf=ign_fnf,
+                           binary=binary, encoding=encoding, errors=errors):
+        entry = _mapping_entry(fname, line, sep, skip_fails)
+        if entry:
+            result[entry[0]] = entry[1]
     return result
 
 
-def all_input_lines(fnames=[], cont_err=False, ign_fnf=False):
+def _mapping_entry(fname, line, sep, skip_fails):
+    """Return (key, value) of a stripped mapping line, or None to skip it."""
+    key, *rest = line.split(sep, 1)
+    if len(rest) == 1:
+        return key, rest[0]
+    if skip_fails:
+        return None
+    raise ValueError(f"{fname}:{line}: "
+                     + "key/value line has only one field")
+
+
+class MappingFile(collections.abc.Mapping):
+    """A key/value mapping read from a file, reloaded when the file changes.
+
+    The file is read as with `read_mapping()`. Before an access, the file's
+    modification time, size, and inode number are checked (at most every
+    `check_interval` seconds), and the mapping is reloaded if they have
+    changed.
+
+    If `index` is true, the mapping is not held in memory. Instead, the
+    offsets of the lines in the file, sorted by key, are kept in an index
+    file (`index` if it is a string, otherwise the file name plus `.index`),
+    and a key is looked up in the file by binary search. The index file is
+    rewritten when it does not match the file any more, so a fresh process
+    can look up keys without reading the whole file.
+    """
+
+    index_magic = b"jpylib-mapping-index-1"
+
+    def __init__(self, fname, sep=None, skip_fails=False,
+                 comments_re="^\\s*#", encoding=None, index=False,
+                 check_interval=0):
+        self.fname = fname
+        self.sep = sep
+        self.skip_fails = skip_fails
+        self.comments_re = comments_re
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        if index is True:
+            index = fname + ".index"
+        self.index = index
+        self.check_interval = check_interval
+        self._skip_re = comments_re and re.compile(comments_re)
+        self._lock = threading.RLock()
+        self._signature = None          # of the file when last loaded
+        self._checked = None            # time of last check
+        self._mapping = None            # dict, if not using an index
+        self._offsets = None            # array of line offsets, sorted by key
+        self._file = None               # open file for index lookups
+
+    def _check(self):
+        """Reload the mapping if the file has changed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked is not None \
+               and now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            st = os.stat(self.fname)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if signature == self._signature:
+                return
+            if self.index:
+                self._load_index(signature)
+            else:
+                self._mapping = read_mapping(
+                    self.fname, sep=self.sep, skip_fails=self.skip_fails,
+                    comments_re=self.comments_re, encoding=self.encoding)
+            self._signature = signature
+
+    def _entry(self, line):
+        """Return (key, value) for a line of the file (bytes), or None."""
+        line = line.decode(self.encoding).strip()
+        if not line or self._skip_re and self._skip_re.search(line):
+            return None
+        return _mapping_entry(self.fname, line, self.sep, self.skip_fails)
+
+    def _index_header(self, signature):
+        """Return the index file header matching the file and parameters.
+
+        The byte order is included, as the offsets are stored as they are. The
+        header line is completed with the number of offsets.
+        """
+        params = repr((self.sep, self.skip_fails, self.comments_re,
+                       self.encoding)).encode()
+        return b" ".join([self.index_magic, sys.byteorder.encode(),
+                          *(str(n).encode() for n in signature),
+                          hashlib.sha1(params).hexdigest().encode()]) + b" "
+
+    def _load_index(self, signature):
+        """Load the index file, or (re)build it if it doesn't match."""
+        header = self._index_header(signature)
+        offsets = array.array("q")
+        valid = False
+        try:
+            with open(self.index, "rb") as f:
+                line = f.readline()
+                count = line[len(header):-1]
+                if line.startswith(header) and count.isdigit():
+                    data = f.read()
+                    # a truncated index is stale, too
+                    valid = len(data) == int(count) * offsets.itemsize
+                    if valid:
+                        offsets.frombytes(data)
+        except FileNotFoundError:
+            pass
+        if not valid:
+            offsets = self._build_index(header)
+        if self._file:
+            self._file.close()
+        self._file = open(self.fname, "rb")
+        self._offsets = offsets
+
+    def _build_index(self, header):
+        """Build the offsets array from the file and write the index file."""
+        entries = {}
+        with open(self.fname, "rb") as f:
+            offset = 0
+            for line in f:
+                entry = self._entry(line)
+                if entry:
+                    entries[entry[0]] = offset
+                offset += len(line)
+        offsets = array.array("q", (entries[key] for key in sorted(entries)))
+        tmpname = "{}.{}.tmp".format(self.index, os.getpid())
+        with open(tmpname, "wb") as f:
+            f.write(header + str(len(offsets)).encode() + b"\n")
+            offsets.tofile(f)
+        os.replace(tmpname, self.index)
+        return offsets
+
+    def _entry_at(self, pos):
+        """Return the (key, value) entry at position `pos` of the index."""
+        self._file.seek(self._offsets[pos])
+        return self._entry(self._file.readline())
+
+    def __getitem__(self, key):
+        self._check()
+        if not self.index:
+            return self._mapping[key]
+        with self._lock:
+            low, high = 0, len(self._offsets)
+            while low < high:
+                mid = (low + high) // 2
+                entry = self._entry_at(mid)
+                if entry[0] == key:
+                    return entry[1]
+                if entry[0] < key:
+                    low = mid + 1
+                else:
+                    high = mid
+        raise KeyError(key)
+
+    def __iter__(self):
+        self._check()
+        if not self.index:
+            return iter(self._mapping)
+        with self._lock:
+            return iter([self._entry_at(pos)[0]
+                         for pos in range(len(self._offsets))])
+
+    def __len__(self):
+        self._check()
+        if not self.index:
+            return len(self._mapping)
+        return len(self._offsets)
+
+    def close(self):
+        """Close the file used for index lookups, if any."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._signature = None
+
+
+_mapping_cache = {}
+_mapping_cache_lock = threading.Lock()
+
+def cached_mapping(fname, **kwargs):
+    """Return a `MappingFile` for `fname`, the same one for repeated calls.
+
+    The kwargs are passed to the `MappingFile` constructor; different kwargs
+    for the same file result in different `MappingFile` objects.
+    """
+    cache_key = (os.path.abspath(fname), tuple(sorted(kwargs.items())))
+    with _mapping_cache_lock:
+        mapping = _mapping_cache.get(cache_key)
+        if mapping is None:
+            mapping = MappingFile(fname, **kwargs)
+            _mapping_cache[cache_key] = mapping
+    return mapping
+
+
+def all_input_lines(fnames=[], cont_err=False, ign_fnf=False, prefetch=0,
+                    ordered=True, binary=False, encoding=None, errors=None,
+                    use_mmap=False, decompress=False):
     """Like Perl's diamond operator `<>`, return lines from files or stdin.
 
     (Generator) If `fnames` is empty, return lines from stdin, otherwise
@@ -38,42 +253,319 @@ def all_input_lines(fnames=[], cont_err=False, ign_fnf=False):
     printing an error message. If `cont_err` is a callable, call it with
     the file name and the exception on error. If `ign_fnf` is true, ignore
     a FileNotFoundError and continue silently.
+
+    If `prefetch` is greater than zero, up to that many files are opened and
+    read ahead by a pool of threads, each one as a whole, while the lines of
+    the current one are returned. This helps with many files on storage with
+    a high latency. If `ordered` is false, the lines of the files are returned
+    in the order in which the files have been read, not in that of `fnames`.
+
+    If `binary` is true, the files are read in binary mode with a large
+    buffer, and the lines are returned as bytes, without any decoding or
+    newline translation. Otherwise, `encoding` and `errors` are used to
+    decode the files as with `open()`.
+
+    If `use_mmap` is true, regular files are memory-mapped instead of read,
+    and the lines are split at newline characters only, without newline
+    translation. If `use_mmap` is `"memoryview"`, the lines are returned as
+    memoryview slices of the mapped file, regardless of `binary`; a file is
+    unmapped only when no slice of it is referenced any more. Stdin and other
+    non-regular files are read as usual. `use_mmap` is ignored if `prefetch`
+    is used.
+
+    If `decompress` is true, files compressed with gzip, bzip2, xz, or zstd
+    (the latter needs Python 3.14 or the `zstandard` module) are recognised
+    by their first bytes and decompressed while reading; other files are read
+    as they are. If `decompress` is `"thread"`, the decompression is done in
+    a separate thread for each compressed file, ahead of the lines being
+    consumed. Compressed files are not memory-mapped.
     """
     if not fnames:
         fnames = ["-"]
+    open_args = dict(binary=binary, encoding=encoding, errors=errors,
+                     decompress=decompress)
+    if prefetch > 0:
+        yield from _prefetched_lines(fnames, cont_err, ign_fnf, prefetch,
+                                     ordered, open_args)
+        return
     for fname in fnames:
         try:
-            if fname == "-":
-                # Read from sys.stdin (not "/dev/stdin") for easier testing.
-                for line in sys.stdin:
+            if use_mmap and fname != "-":
+                yield from _mapped_lines(fname, use_mmap, **open_args)
+                continue
+            with _open_input(fname, **open_args) as f:
+                for line in f:
                     yield line
-            else:
-                with open(fname) as f:
-                    for line in f:
-                        yield line
         except Exception as e:
-            if ign_fnf and isinstance(e, FileNotFoundError):
-                continue
-            if cont_err:
-                if callable(cont_err):
-                    cont_err(fname, e)
-                else:
-                    program = os.path.basename(sys.argv[0])
-                    print(program+":", e, file=sys.stderr)
+            _input_error(fname, e, cont_err, ign_fnf)
+
+
+def _open_input(fname, binary=False, encoding=None, errors=None,
+                decompress=False):
+    """Open the named input file (`-` for stdin) in the specified mode."""
+    if decompress:
+        return _decompressed_input(fname, binary, encoding, errors,
+                                   decompress)
+    if fname == "-":
+        return _stdin(binary, encoding, errors)
+    if binary:
+        return open(fname, "rb", buffering=binary_bufsize)
+    return open(fname, encoding=encoding, errors=errors)
+
+
+def _open_zstd(f):
+    """Return a file object decompressing zstd data from file `f`."""
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(f)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("cannot decompress zstd data without the"
+                          " zstandard module")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+        f, closefd=False), buffer_size=binary_bufsize)
+
+
+# magic bytes at the start of compressed data and the function to open a file
+# object decompressing it
+compression_magic = (
+    (b"\x1f\x8b", lambda f: gzip.GzipFile(fileobj=f)),
+    (b"BZh", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", lzma.LZMAFile),
+    (b"\x28\xb5\x2f\xfd", _open_zstd),
+)
+
+
+def _decompressor(head):
+    """Return the opener for data starting with `head` if it is compressed."""
+    for magic, opener in compression_magic:
+        if head.startswith(magic):
+            return opener
+    return None
+
+
+@contextlib.contextmanager
+def _decompressed_input(fname, binary, encoding, errors, decompress):
+    """Context manager: open input file, decompressing if necessary."""
+    with contextlib.ExitStack() as stack:
+        if fname == "-":
+            f = getattr(sys.stdin, "buffer", None)
+        else:
+            f = stack.enter_context(open(fname, "rb",
+                                         buffering=binary_bufsize))
+        opener = hasattr(f, "peek") and _decompressor(f.peek(6))
+        if not opener:
+            if fname == "-":
+                f = stack.enter_context(_stdin(binary, encoding, errors))
+            elif not binary:
+                f = io.TextIOWrapper(f, encoding=encoding, errors=errors)
+            yield f
+            return
+        f = stack.enter_context(opener(f))
+        if decompress == "thread":
+            f = io.BufferedReader(stack.enter_context(_ThreadedReader(f)),
+                                  buffer_size=binary_bufsize)
+        if not binary:
+            f = io.TextIOWrapper(f, encoding=encoding, errors=errors)
+            # don't let the wrapper close stdin's buffer when collected
+            stack.callback(f.detach)
+        yield f
+
+
+class _ThreadedReader(io.RawIOBase):
+    """Raw reader returning the data read from a file object by a thread.
+
+    The thread reads ahead up to `decompress_ahead` chunks of data.
+    """
+
+    def __init__(self, source):
+        self._queue = queue.Queue(maxsize=decompress_ahead)
+        self._stop = threading.Event()
+        self._chunk = b""
+        self._thread = threading.Thread(target=self._reader, args=(source,),
+                                        daemon=True)
+        self._thread.start()
+
+    def _reader(self, source):
+        """Read data from `source` into the queue, then b"" or an exception."""
+        try:
+            while not self._stop.is_set():
+                data = source.read(binary_bufsize)
+                self._put(data)
+                if not data:
+                    break
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        """Put item into the queue unless stopped while waiting."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._chunk:
+            if self._thread is None:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._thread = None
+                return 0
+            self._chunk = item
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            if self._thread:
+                self._thread.join()
+        super().close()
+
+
+@contextlib.contextmanager
+def _stdin(binary, encoding, errors):
+    """Context manager: return stdin in the specified mode, but don't close.
+
+    Read from sys.stdin (not "/dev/stdin") for easier testing.
+    """
+    if binary:
+        yield getattr(sys.stdin, "buffer", sys.stdin)
+    elif (encoding or errors) and hasattr(sys.stdin, "buffer"):
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding=encoding,
+                             errors=errors)
+        try:
+            yield f
+        finally:
+            f.detach()
+    else:
+        yield sys.stdin
+
+
+def _input_error(fname, e, cont_err, ign_fnf):
+    """Handle exception `e` on reading `fname` as per `all_input_lines()`."""
+    if ign_fnf and isinstance(e, FileNotFoundError):
+        return
+    if cont_err:
+        if callable(cont_err):
+            cont_err(fname, e)
+        else:
+            program = os.path.basename(sys.argv[0])
+            print(program+":", e, file=sys.stderr)
+    else:
+        raise e
+
+
+def _mapped_lines(fname, use_mmap, binary=False, encoding=None, errors=None,
+                  decompress=False):
+    """Return the lines of a regular file from a memory map (generator).
+
+    Other files, and empty ones, which cannot be mapped, are read as usual,
+    as are compressed files if they are to be decompressed.
+    """
+    with open(fname, "rb", buffering=binary_bufsize) as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0 \
+           or decompress and _decompressor(f.peek(6)):
+            with _open_input(fname, binary, encoding, errors,
+                             decompress) as f:
+                yield from f
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = None
+    if use_mmap == "memoryview":
+        view = memoryview(mapped)
+    elif not binary:
+        encoding = encoding or locale.getpreferredencoding(False)
+        errors = errors or "strict"
+    try:
+        find = mapped.find
+        size = len(mapped)
+        pos = 0
+        while pos < size:
+            end = find(b"\n", pos) + 1 or size
+            if view is not None:
+                yield view[pos:end]
+            elif binary:
+                yield mapped[pos:end]
+            else:
+                yield mapped[pos:end].decode(encoding, errors)
+            pos = end
+    finally:
+        if view is not None:
+            view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            # slices still in use; will be closed when they are gone
+            pass
+
+
+def _read_lines(fname, open_args):
+    """Return the lines of file `fname` (`-` for stdin) as a list."""
+    with _open_input(fname, **open_args) as f:
+        return f.readlines()
+
+
+def _prefetched_lines(fnames, cont_err, ign_fnf, prefetch, ordered,
+                      open_args):
+    """Return lines from files read ahead by a thread pool (generator).
+
+    Up to `prefetch` files are in flight at a time. The arguments are as
+    for `all_input_lines()`.
+    """
+    fnames = iter(fnames)
+    pending = collections.OrderedDict() # future => fname
+    with concurrent.futures.ThreadPoolExecutor(max_workers=prefetch) as pool:
+        def submit():
+            for fname in fnames:
+                pending[pool.submit(_read_lines, fname, open_args)] = fname
+                if len(pending) >= prefetch:
+                    break
+
+        submit()
+        while pending:
+            if ordered:
+                done = [next(iter(pending))]
             else:
-                raise e
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                fname = pending.pop(future)
+                submit()
+                try:
+                    lines = future.result()
+                except Exception as e:
+                    _input_error(fname, e, cont_err, ign_fnf)
+                    continue
+                yield from lines
 
 
 def read_items(fname, lstrip=True, rstrip=True, strip_newline=True,
                comments_re="^\\s*#", skip_comments=True, skip_empty=True,
-               ign_fnf=False):
+               ign_fnf=False, prefetch=0, ordered=True, binary=False,
+               encoding=None, errors=None, use_mmap=False, decompress=False):
     
     """Read lines/items from one or more files (generator).
 
     With the defaults, comment like `# ...` and empty lines are skipped, and
     whitespace is stripped from the left and right ends of each line.
 
-    `fname` is the name of the file to read; `-` may be used for stdin.
+    `fname` is the name of the file to read; `-` may be used for stdin. It
+    may also be a sequence of file names, which are read in succession.
 
     If `lstrip` is True, whitespace will be stripped from the left side of
     each line. If it is a string, it specifies the characters to be stripped.
@@ -95,51 +587,143 @@ def read_items(fname, lstrip=True, rstrip=True, strip_newline=True,
 
     If `ign_fnf` is true, ignore a FileNotFoundError and continue silently.
 
+    `prefetch`, `ordered`, `binary`, `encoding`, `errors`, `use_mmap`, and
+    `decompress` are passed to `all_input_lines()` (see there). With
+    `binary`, the items are bytes, and `lstrip`, `rstrip`, and `comments_re`
+    strings are encoded to match. `use_mmap` cannot be `"memoryview"` here,
+    as memoryview lines cannot be stripped.
+
+    """
+    if use_mmap == "memoryview":
+        raise ValueError("read_items() cannot use memoryview lines")
+    fnames = fname if is_sequence(fname) else (fname,)
+    yield from _filter_items(
+        all_input_lines(fnames, ign_fnf=ign_fnf, prefetch=prefetch,
+                        ordered=ordered, binary=binary, encoding=encoding,
+                        errors=errors, use_mmap=use_mmap,
+                        decompress=decompress),
+        lstrip, rstrip, strip_newline, comments_re, skip_comments,
+        skip_empty, binary)
+
+
+def read_item_chunks(fname, lstrip=True, rstrip=True, strip_newline=True,
+                     comments_re="^\\s*#", skip_comments=True, skip_empty=True,
+                     ign_fnf=False, binary=False, encoding=None, errors=None,
+                     decompress=False, chunk_size=binary_bufsize):
+    """Read lines/items from one or more files in chunks (generator).
+
+    Like `read_items()`, but return lists of items, each from a chunk of
+    about `chunk_size` characters (or bytes, with `binary`) of input. The
+    chunks are split into lines, and these are stripped and filtered, with
+    hardly any Python-level operations per line; chunks are searched for
+    comments as a whole first. This is a lot faster for large files.
+
+    The other arguments are as for `read_items()`.
+    """
+    newline = b"\n" if binary else "\n"
+    def filtered(lines):
+        """Return a list of the items from `lines` (without newlines)."""
+        if not strip_newline:
+            lines = [line + newline for line in lines]
+        items = list(_filter_items(lines, lstrip, rstrip, strip_newline,
+                                   None, False, skip_empty, binary))
+        if skip_re:
+            items = _drop_comments(items, skip_re, newline)
+        return items
+
+    skip_re = None
+    if comments_re and skip_comments:
+        skip_re = re.compile(comments_re.encode()
+                             if binary and isinstance(comments_re, str)
+                             else comments_re)
+
+    fnames = fname if is_sequence(fname) else (fname,)
+    for fname in fnames:
+        try:
+            with _open_input(fname, binary, encoding, errors,
+                             decompress) as f:
+                rest = newline[:0]
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    lines = (rest + chunk).split(newline)
+                    rest = lines.pop()
+                    items = filtered(lines)
+                    if items:
+                        yield items
+                if rest:
+                    # last line without a newline
+                    items = list(_filter_items([rest], lstrip, rstrip,
+                                               strip_newline, None, False,
+                                               skip_empty, binary))
+                    if skip_re:
+                        items = _drop_comments(items, skip_re, newline)
+                    if items:
+                        yield items
+        except Exception as e:
+            _input_error(fname, e, False, ign_fnf)
+
+
+def _drop_comments(items, skip_re, newline):
+    """Return `items` without those matching `skip_re` (a list).
+
+    Search the items joined by newlines once with the multi-line variant of
+    `skip_re`; only if that finds anything, match each item. Patterns that
+    may behave differently in the joined items are always matched per item.
+    """
+    pattern = skip_re.pattern
+    tokens = ("\\A", "\\Z", "(?<")
+    if isinstance(pattern, bytes):
+        tokens = [token.encode() for token in tokens]
+    if not any(token in pattern for token in tokens):
+        chunk_re = re.compile(pattern, skip_re.flags | re.MULTILINE)
+        if not chunk_re.search(newline.join(items)):
+            return items
+    return list(itertools.filterfalse(skip_re.search, items))
+
+
+def _filter_items(lines, lstrip, rstrip, strip_newline, comments_re,
+                  skip_comments, skip_empty, binary):
+    """Return the items from `lines` as per `read_items()` (iterator).
+
+    The stripping and filtering is done by chaining `map()`, `filter()`, and
+    `itertools.filterfalse()` with `str` (or `bytes`) methods, so there are
+    no Python-level function calls per line.
     """
-    def lstrip_func(chars):
-        """Return function to strip chars from the left siide of a string."""
-        def lstrip_f(s):
-            return s.lstrip(chars)
-        return lstrip_f
-
-    def rstrip_func(chars):
-        """Return function to strip chars from the right side of a string."""
-        def rstrip_f(s):
-            return s.rstrip(chars)
-        return rstrip_f
+    def as_mode(arg):
+        """Return a str argument encoded to bytes if in binary mode."""
+        if binary and isinstance(arg, str):
+            return arg.encode()
+        return arg
+
+    strtype = bytes if binary else str
+    newline = as_mode("\n")
 
     if lstrip:
-        if isinstance(lstrip, str):
-            lstripper = lstrip_func(lstrip)
+        if isinstance(lstrip, (str, bytes)):
+            lines = map(strtype.lstrip, lines,
+                        itertools.repeat(as_mode(lstrip)))
         else:
-            lstripper = str.lstrip
-    else:
-        lstripper = identity
+            lines = map(strtype.lstrip, lines)
 
     if rstrip:
-        if isinstance(rstrip, str):
-            if strip_newline and "\n" not in rstrip:
-                rstrip += "\n"
-            rstripper = rstrip_func(rstrip)
+        if isinstance(rstrip, (str, bytes)):
+            rstrip = as_mode(rstrip)
+            if strip_newline and newline not in rstrip:
+                rstrip += newline
+            lines = map(strtype.rstrip, lines, itertools.repeat(rstrip))
         else:
-            rstripper = str.rstrip
-    else:
-        if strip_newline:
-            rstripper = rstrip_func("\n")
-        else:
-            rstripper = identity
+            lines = map(strtype.rstrip, lines)
+    elif strip_newline:
+        lines = map(strtype.rstrip, lines, itertools.repeat(newline))
+
+    if skip_empty:
+        lines = filter(None, lines)
 
     if comments_re and skip_comments:
-        skip_re = re.compile(comments_re)
-    else:
-        skip_re = False
-
-    for line in all_input_lines((fname,), ign_fnf=ign_fnf):
-        stripped_line = rstripper(lstripper(line))
-        if skip_empty and not stripped_line:
-            continue
-        if skip_re and skip_re.search(stripped_line):
-            continue
-        yield(stripped_line)
+        lines = itertools.filterfalse(re.compile(as_mode(comments_re)).search,
+                                      lines)
+    return lines
 
 # EOF
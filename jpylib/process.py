@@ -2,15 +2,238 @@
 
 # Do things with processes.
 
+import io
+import os
+import re
+import sys
+import time
+import uuid
+import shlex
+import atexit
+import codecs
+import signal
+import asyncio
+import functools
 import selectors
+import threading
 import subprocess
+import concurrent.futures
 from .alerts import *
+from .namespace import Namespace
 
 # we take these characters as the indication to run a command in the shell, if
 # not otherwise indicated
 shellmeta = "\"'`|&;[(<>)]*?$"
 
-def backquote(command, shell=None, full_result=False, silent=False):
+# default number of commands run concurrently by backquote_many() and
+# backquote_batch()
+concurrency_limit = 16
+
+# maximum number of failures listed in the message of a BatchError
+batch_errors_shown = 5
+
+# number of prepared command strings kept by _prepare_command()
+command_cache_size = 256
+
+# maximum size of a single read from the output pipes of a process
+read_chunk_size = 64 * 1024
+
+# seconds to wait after SIGTERM before a timed out process gets SIGKILL
+kill_grace = 2
+
+# factor to get bytes from ru_maxrss, which is in kilobytes except on macOS
+maxrss_unit = 1 if sys.platform == "darwin" else 1024
+
+
+def _prepare_command(command, shell):
+    """Return the argument list for `command` and if it is run in a shell.
+
+    See `backquote()` for the meaning of `shell`. A command string is split
+    like the shell does (but without expansions) if it is not run in a shell.
+    The results for command strings are cached.
+    """
+    if isinstance(command, (list, tuple)):
+        return command, False
+    argv, run_shell = _prepare_string(str(command), shell, shellmeta)
+    return list(argv), run_shell
+
+
+@functools.lru_cache(maxsize=command_cache_size)
+def _prepare_string(command, shell, shellmeta):
+    """Return the argument tuple for `command` and if it is run in a shell.
+
+    This does the work for `_prepare_command()`; `shellmeta` is an argument
+    so changes of it are respected by the cache.
+    """
+    if shell:
+        if shell is True:
+            shell = "/bin/sh"
+        return (shell, "-c", command), True
+    if shell is None and re.search("[{}]".format(re.escape(shellmeta)),
+                                   command):
+        return ("/bin/sh", "-c", command), True
+    return tuple(shlex.split(command)), False
+
+
+def _backquote_result(command, result, run_shell, full_result, silent):
+    """Return the `result` of `command` as specified for `backquote()`."""
+    if full_result:
+        if full_result == "plus":
+            return result, run_shell
+        return result
+    else:
+        if not silent and (result[1] or result[2]):
+            raise ChildProcessError("command {} exited status {}; stderr: {}"
+                                    .format(command, result[2],
+                                            repr(result[1])))
+        return result[0]
+
+
+def _output_chunks(streams, procs, command, timeout=None, chunk_size=None):
+    """Yield the output from `streams` as (stream, data) tuples until EOF.
+
+    `stream` is one of `streams` (the output pipes of the processes `procs`),
+    and `data` the bytes read from it, which are empty at EOF. All streams
+    are read without blocking as data is available, up to `chunk_size`
+    (default: `read_chunk_size`) bytes at a time. If `timeout` is not None,
+    stop `procs` after `timeout` seconds (see `_stop()`) and raise a
+    `subprocess.TimeoutExpired` exception.
+
+    """
+    chunk_size = chunk_size or read_chunk_size
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with selectors.DefaultSelector() as sel:
+        for stream in streams:
+            os.set_blocking(stream.fileno(), False)
+            sel.register(stream, selectors.EVENT_READ)
+        while sel.get_map():
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    _stop(*procs)
+                    raise subprocess.TimeoutExpired(command, timeout)
+            for key, mask in sel.select(remaining):
+                try:
+                    data = os.read(key.fd, chunk_size)
+                except BlockingIOError:
+                    continue
+                if len(data) == 0:
+                    sel.unregister(key.fileobj)
+                yield key.fileobj, data
+
+
+def _signal(proc, sig):
+    """Send `sig` to `proc`, or to its process group if it leads one.
+
+    Processes started with a timeout get their own process group, so the
+    processes started by them (e.g. by a shell) are stopped, too.
+    """
+    if proc.returncode is not None:
+        return
+    try:
+        if os.getpgid(proc.pid) == proc.pid:
+            os.killpg(proc.pid, sig)
+        else:
+            proc.send_signal(sig)
+    except ProcessLookupError:
+        pass
+
+
+def _stop(*procs):
+    """Terminate `procs`; kill those still alive after `kill_grace`."""
+    for proc in procs:
+        _signal(proc, signal.SIGTERM)
+    deadline = time.monotonic() + kill_grace
+    for proc in procs:
+        try:
+            proc.wait(max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            _signal(proc, signal.SIGKILL)
+            proc.wait()
+
+
+def _split_lines(chunks, binary):
+    """Yield the lines from the sequence of output data `chunks`.
+
+    The lines are decoded from UTF-8 unless `binary` is true.
+    """
+    pending = []                        # data after the last newline
+
+    def lines(data):
+        """Return an iterator over the lines in `data`."""
+        if binary:
+            return io.BytesIO(data)
+        return io.StringIO(data.decode("utf-8"), newline="\n")
+
+    for data in chunks:
+        pending.append(data)
+        if b"\n" not in data:
+            continue
+        # newline bytes never occur within UTF-8 encoded characters
+        chunk = b"".join(pending)
+        end = chunk.rindex(b"\n") + 1
+        pending = [chunk[end:]]
+        yield from lines(chunk[:end])
+    yield from lines(b"".join(pending))
+
+
+def _wait(proc, command, timeout=None, start=None):
+    """Wait for `proc` to end; return its resource usage as a Namespace.
+
+    If `timeout` is not None, stop `proc` (see `_stop()`) if it has not ended
+    `timeout` seconds after `start` (a `time.monotonic()` value, default:
+    now), and raise a `subprocess.TimeoutExpired` exception.
+
+    The returned Namespace has the attributes `wall` (the elapsed time since
+    `start`), `utime` and `stime` (user and system CPU time), all in seconds,
+    and `maxrss` (the maximum resident set size in bytes).
+
+    """
+    if start is None:
+        start = time.monotonic()
+    delay = 0.0005
+    while True:
+        pid, status, rusage = os.wait4(proc.pid,
+                                       0 if timeout is None else os.WNOHANG)
+        if pid:
+            break
+        remaining = start + timeout - time.monotonic()
+        if remaining <= 0:
+            _stop(proc)
+            raise subprocess.TimeoutExpired(command, timeout)
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return Namespace(wall=time.monotonic() - start, utime=rusage.ru_utime,
+                     stime=rusage.ru_stime,
+                     maxrss=rusage.ru_maxrss * maxrss_unit)
+
+
+def _decoder(binary):
+    """Return a function decoding output chunks: `decode(data, final)`.
+
+    The chunks are decoded incrementally as UTF-8, so characters may be split
+    between chunks; if `binary` is true, the data is returned unchanged.
+    """
+    if binary:
+        return lambda data, final=False: data
+    return codecs.getincrementaldecoder("utf-8")().decode
+
+
+def _popen_output(command, timeout):
+    """Start `command` with pipes for stdout and stderr; return the Popen.
+
+    With a `timeout`, the command gets its own process group (see `_signal()`).
+    """
+    return subprocess.Popen(command, stdin=subprocess.DEVNULL, bufsize=0,
+                            stderr=subprocess.PIPE, stdout=subprocess.PIPE,
+                            start_new_session=timeout is not None)
+
+
+def backquote(command, shell=None, full_result=False, silent=False,
+              timeout=None, binary=False, chunk_size=None, resources=False,
+              worker=None):
     """Similar to Perl's \\`command\\` feature: run process, return output.
 
     If command is a tuple or a list, run it directly. Otherwise, make it a
@@ -27,6 +250,9 @@ def backquote(command, shell=None, full_result=False, silent=False):
      - If `shell` is otherwise false, split the string into a list and run it
        directly.
 
+    The string is split into a list like the shell does with quotes and
+    backslashes (using `shlex.split()`), but without any expansions.
+
     If `full_result` is false (the default), return only stdout as a string. In
     this case, a `ChildProcessError` is raised if the exit status of the command
     is non-zero or stderr is not empty. This can be suppressed by setting
@@ -39,64 +265,563 @@ def backquote(command, shell=None, full_result=False, silent=False):
     In any case, however, there will be an exception raised if the called
     program cannot be found.
 
+    If `timeout` is not None, the process is terminated if it has not
+    finished after `timeout` seconds (and killed if it is still alive
+    `kill_grace` seconds later), and a `subprocess.TimeoutExpired` exception
+    is raised, with the output so far as its `output` and `stderr` attributes.
+    The process runs in its own process group then, so the processes it has
+    started are stopped with it; it is not in the terminal's foreground group.
+
+    If `resources` and `full_result` are true, the result tuple has a fourth
+    element, a Namespace with the resource usage of the process: `wall` (the
+    elapsed time), `utime` and `stime` (user and system CPU time), all in
+    seconds, and `maxrss` (the maximum resident set size in bytes).
+
+    If `binary` is true, stdout and stderr are returned as bytes; otherwise,
+    they are decoded as UTF-8. The output is read in chunks of up to
+    `chunk_size` (default: `read_chunk_size`) bytes.
+
+    If `worker` is a `ShellWorker` (or true, for the default one), the command
+    is run by that instead of a new process. Then a program that cannot be
+    found results in exit status 127 instead of an exception, the exit status
+    of a command killed by a signal is 128 plus the signal number, and
+    `resources` is not available.
+
     """
-    run_shell = False                   # for testing
-    if not isinstance(command, (list, tuple)):
-        command = str(command)
-        if shell:
-            if shell is True:
-                shell = "/bin/sh"
-            command = [shell, "-c", command]
-            run_shell = True
-        elif shell is None:
-            if any([ ch in shellmeta for ch in command ]):
-                command = ["/bin/sh", "-c", command]
-                run_shell = True
-            else:
-                command = command.split()
+    command, run_shell = _prepare_command(command, shell)
+    if worker:
+        if resources:
+            raise ValueError("resources not available with a shell worker")
+        if worker is True:
+            worker = shell_worker()
+        if command[:2] == [worker.shell, "-c"]:
+            script = command[2]
         else:
-            command = command.split()
-
+            script = shlex.join(command)
+        result = worker.run(script, timeout, binary, chunk_size)
+        return _backquote_result(command, result, run_shell, full_result,
+                                 silent)
+    empty = b"" if binary else ""
+    start = time.monotonic()
     outbuf = []
     errbuf = []
 
-    sel = selectors.DefaultSelector()
-    fds_active = 2
+    outdecode = _decoder(binary)
+    errdecode = _decoder(binary)
 
-    def read_callback(f, buf):
-        nonlocal fds_active
-        data = f.read().decode("utf-8")
-        if len(data) == 0:
-            fds_active -= 1
-        buf.append(data)
+    with _popen_output(command, timeout) as proc:
+        try:
+            for stream, data in _output_chunks((proc.stdout, proc.stderr),
+                                               [proc], command, timeout,
+                                               chunk_size):
+                if stream is proc.stdout:
+                    outbuf.append(outdecode(data, not data))
+                else:
+                    errbuf.append(errdecode(data, not data))
+            usage = _wait(proc, command, timeout, start)
+        except subprocess.TimeoutExpired as e:
+            e.output = empty.join(outbuf)
+            e.stderr = empty.join(errbuf)
+            raise
+        result = (empty.join(outbuf), empty.join(errbuf), proc.returncode)
+        if resources and full_result:
+            result += (usage,)
+    return _backquote_result(command, result, run_shell, full_result, silent)
 
-    
-    with subprocess.Popen(command, stdin=subprocess.DEVNULL,
-                          stderr=subprocess.PIPE,
-                          stdout=subprocess.PIPE) as proc:
-        sel.register(proc.stdout, selectors.EVENT_READ, outbuf)
-        sel.register(proc.stderr, selectors.EVENT_READ, errbuf)
-
-        while fds_active > 0:
-            for key, mask in sel.select():
-                read_callback(key.fileobj, key.data)
-        proc.stdout.close()
-        proc.stderr.close()
-        proc.wait()
-        result = ("".join(outbuf), "".join(errbuf), proc.returncode)
-    if full_result:
-        if full_result == "plus":
-            return result, run_shell
-        return result
-    else:
-        if not silent and (result[1] or result[2]):
-            raise ChildProcessError("command {} exited status {}; stderr: {}"
-                                    .format(command, result[2],
-                                            repr(result[1])))
-        return result[0]
 
+def backquote_lines(command, shell=None, silent=False, timeout=None,
+                    binary=False, chunk_size=None):
+    """Run process, yield the lines of its output as they come (generator).
+
+    Like `backquote()`, but the lines of stdout are yielded (with their
+    newline characters) as soon as they are read, so the output need not fit
+    into memory, and can be processed while the command is still running.
+    stderr is read at the same time.
+
+    When the command has finished, a `ChildProcessError` is raised if its exit
+    status is non-zero or stderr is not empty, unless `silent` is true. If the
+    generator is closed before the end of the output, the process is killed.
 
-def system(command, shell=None):
+    `shell`, `timeout`, `binary`, and `chunk_size` are as for `backquote()`;
+    with `binary`, the lines are bytes.
+
+    """
+    command, run_shell = _prepare_command(command, shell)
+    start = time.monotonic()
+    errbuf = []
+
+    def stdout_chunks(proc):
+        """Yield the stdout data of `proc`; collect stderr in `errbuf`."""
+        for stream, data in _output_chunks((proc.stdout, proc.stderr),
+                                           [proc], command, timeout,
+                                           chunk_size):
+            if stream is proc.stderr:
+                errbuf.append(data)
+            else:
+                yield data
+
+    with _popen_output(command, timeout) as proc:
+        try:
+            yield from _split_lines(stdout_chunks(proc), binary)
+            _wait(proc, command, timeout, start)
+        except BaseException:
+            _signal(proc, signal.SIGKILL)
+            raise
+        errout = b"".join(errbuf)
+        result = (b"", errout if binary else errout.decode("utf-8"),
+                  proc.returncode)
+    _backquote_result(command, result, run_shell, False, silent)
+
+
+def _feed_input(stream, input, errors):
+    """Write `input` (str, bytes, or an iterable of them) to `stream`.
+
+    Close `stream` at the end. An exception raised by `input` is appended to
+    the list `errors`.
+    """
+    if isinstance(input, (str, bytes)):
+        input = [input]
+    try:
+        for data in input:
+            stream.write(data.encode("utf-8") if isinstance(data, str)
+                         else data)
+    except BrokenPipeError:
+        pass                            # the stage has ended early
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+
+def pipeline(commands, input=None, shell=None, lines=True, binary=False,
+             silent=False, timeout=None, chunk_size=None):
+    """Run `commands` as a pipeline, yield the output of the last one.
+
+    The commands are connected directly with pipes, like in a shell
+    pipeline, but without a shell. Each command is prepared as for
+    `backquote()` according to `shell`, so a command with shell meta
+    characters still runs in a shell by default.
+
+    If `input` is None, stdin of the first command is `/dev/null`. Otherwise
+    it may be a string, bytes, or an iterable of them (e.g. a generator),
+    which is written to the first command's stdin from a separate thread.
+
+    If `lines` is true, yield the lines of the output as they come (with
+    their newline characters); otherwise, yield chunks of output as they
+    are read. `binary`, `timeout`, and `chunk_size` are as for `backquote()`.
+
+    stderr of all commands is collected. When the pipeline has finished, a
+    `ChildProcessError` is raised if the exit status of any command is
+    non-zero (except for one ended by SIGPIPE) or stderr is not empty,
+    unless `silent` is true. An exception raised by `input` is re-raised.
+    If the generator is closed before the end of the output, all processes
+    are killed.
+
+    """
+    commands = [_prepare_command(command, shell)[0] for command in commands]
+    if not commands:
+        raise ValueError("pipeline without commands")
+    start = time.monotonic()
+    procs = []
+    input_errors = []
+    errbuf = []
+    errread, errwrite = os.pipe()
+    try:
+        stdin = subprocess.DEVNULL if input is None else subprocess.PIPE
+        for command in commands:
+            procs.append(subprocess.Popen(
+                command, stdin=stdin, stdout=subprocess.PIPE, stderr=errwrite,
+                start_new_session=timeout is not None))
+            if len(procs) > 1:
+                procs[-2].stdout.close()  # now only the next stage has it
+            stdin = procs[-1].stdout
+    except BaseException:
+        for proc in procs:
+            _signal(proc, signal.SIGKILL)
+            proc.wait()
+            for stream in (proc.stdin, proc.stdout):
+                if stream:
+                    stream.close()
+        os.close(errread)
+        raise
+    finally:
+        os.close(errwrite)
+
+    with open(errread, "rb", buffering=0) as errstream:
+        feeder = None
+        if input is not None:
+            feeder = threading.Thread(target=_feed_input,
+                                      args=(procs[0].stdin, input,
+                                            input_errors),
+                                      daemon=True)
+            feeder.start()
+
+        def stdout_chunks():
+            """Yield the output data; collect stderr in `errbuf`."""
+            last = procs[-1].stdout
+            for stream, data in _output_chunks((last, errstream), procs,
+                                               commands, timeout, chunk_size):
+                if stream is errstream:
+                    errbuf.append(data)
+                else:
+                    yield data
+
+        try:
+            if lines:
+                yield from _split_lines(stdout_chunks(), binary)
+            else:
+                decode = _decoder(binary)
+                for data in stdout_chunks():
+                    data = decode(data, not data)
+                    if data:
+                        yield data
+            for proc in procs:
+                _wait(proc, commands, timeout, start)
+        except BaseException:
+            for proc in procs:
+                _signal(proc, signal.SIGKILL)
+            raise
+        finally:
+            for proc in procs:
+                proc.wait()
+                proc.stdout.close()
+            if feeder:
+                feeder.join()
+
+    if input_errors:
+        raise input_errors[0]
+    statuses = [proc.returncode for proc in procs]
+    errout = b"".join(errbuf)
+    if not silent and (errout or any(status not in (0, -signal.SIGPIPE)
+                                     for status in statuses)):
+        raise ChildProcessError("pipeline {} exited status {}; stderr: {}"
+                                .format(commands, statuses,
+                                        repr(errout if binary
+                                             else errout.decode("utf-8"))))
+
+
+class ShellWorker:
+    """A persistent shell process to run command lines in.
+
+    Running a command line in the worker saves starting a new shell process
+    for each one, which is most of the cost of running small commands. Each
+    command runs in a subshell of the worker, so it cannot change the state
+    of the worker; stdin is `/dev/null`. The current directory and changes
+    of `os.environ` since the start of the worker are passed to the command.
+
+    The worker shell is started on first use, and again if it has died.
+    Commands are run one at a time; the worker can be shared by threads.
+
+    """
+
+    def __init__(self, shell="/bin/sh"):
+        """Initialise a worker for `shell` (default: `/bin/sh`)."""
+        self.shell = shell
+        self.lock = threading.Lock()
+        self.proc = None
+
+    def _start(self):
+        """Start the worker shell process."""
+        self.proc = subprocess.Popen([self.shell], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE, bufsize=0,
+                                     start_new_session=True)
+        self.pid = os.getpid()
+        self.environ = os.environ.copy()
+        self.cwd = os.getcwd()
+        # written after a command's output to stdout and stderr, on stdout
+        # followed by the command's exit status
+        self.marker = uuid.uuid4().hex
+        marker = self.marker.encode()
+        self.ends = {
+            self.proc.stdout: re.compile(b"\n" + marker + b" (\\d+)\n"),
+            self.proc.stderr: re.compile(b"\n" + marker + b"\n"),
+        }
+        os.set_blocking(self.proc.stdout.fileno(), False)
+        os.set_blocking(self.proc.stderr.fileno(), False)
+
+    def _kill(self):
+        """Kill the worker shell and everything started by it."""
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            stream.close()
+        self.proc = None
+
+    def close(self):
+        """End the worker shell; it will be started again on next use."""
+        with self.lock:
+            if self.proc is None or self.pid != os.getpid():
+                return
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(kill_grace)
+            except subprocess.TimeoutExpired:
+                pass
+            self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _script(self, command):
+        """Return the input for the worker to run `command` (bytes)."""
+        setup = []
+        environ = os.environ.copy()
+        if environ != self.environ:
+            for name, value in environ.items():
+                if self.environ.get(name) != value \
+                   and re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+                    setup.append("export {}={}; "
+                                 .format(name, shlex.quote(value)))
+            for name in self.environ:
+                if name not in environ \
+                   and re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+                    setup.append("unset {}; ".format(name))
+        cwd = os.getcwd()
+        if cwd != self.cwd:
+            setup.append("cd {} && ".format(shlex.quote(cwd)))
+        return ("({}eval {}) </dev/null; printf '\\n%s %d\\n' {} $?;"
+                " printf '\\n%s\\n' {} >&2\n"
+                .format("".join(setup), shlex.quote(command), self.marker,
+                        self.marker)
+                .encode())
+
+    def run(self, command, timeout=None, binary=False, chunk_size=None):
+        """Run shell `command`; return a tuple of (stdout, stderr, status).
+
+        `timeout`, `binary`, and `chunk_size` are as for `backquote()`; on
+        timeout, the worker is killed with everything it has started.
+
+        """
+        with self.lock:
+            if self.proc is None or self.pid != os.getpid():
+                self._start()
+            script = memoryview(self._script(command))
+            try:
+                while script:
+                    script = script[os.write(self.proc.stdin.fileno(),
+                                             script):]
+            except BrokenPipeError:
+                self._kill()
+                raise ChildProcessError("shell worker {} has died"
+                                        .format(self.shell))
+            try:
+                out, err, status = self._collect(command, timeout, chunk_size)
+            except subprocess.TimeoutExpired as e:
+                if not binary:
+                    # the output may end within a character
+                    e.output = e.output.decode("utf-8", "replace")
+                    e.stderr = e.stderr.decode("utf-8", "replace")
+                raise
+        if not binary:
+            out, err = out.decode("utf-8"), err.decode("utf-8")
+        return out, err, status
+
+    def _collect(self, command, timeout, chunk_size):
+        """Read the output of `command` up to the markers; return the result."""
+        chunk_size = chunk_size or read_chunk_size
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ends = self.ends
+        bufs = { stream: bytearray() for stream in ends }
+        found = {}
+        with selectors.DefaultSelector() as sel:
+            for stream in ends:
+                sel.register(stream, selectors.EVENT_READ)
+            while len(found) < len(ends):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        output = bytes(bufs[self.proc.stdout])
+                        errout = bytes(bufs[self.proc.stderr])
+                        self._kill()
+                        raise subprocess.TimeoutExpired(command, timeout,
+                                                        output=output,
+                                                        stderr=errout)
+                for key, mask in sel.select(remaining):
+                    try:
+                        data = os.read(key.fd, chunk_size)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        self._kill()
+                        raise ChildProcessError("shell worker {} has died"
+                                                .format(self.shell))
+                    buf = bufs[key.fileobj]
+                    # search only the new data and a possible marker start,
+                    # "\n<marker> <status>\n" with a status of up to 255
+                    pos = max(0, len(buf) - len(self.marker) - 6)
+                    buf += data
+                    match = ends[key.fileobj].search(buf, pos)
+                    if match:
+                        found[key.fileobj] = match
+                        sel.unregister(key.fileobj)
+        out = found[self.proc.stdout]
+        err = found[self.proc.stderr]
+        return (bytes(bufs[self.proc.stdout][:out.start()]),
+                bytes(bufs[self.proc.stderr][:err.start()]),
+                int(out.group(1)))
+
+
+_shell_worker = None
+_shell_worker_lock = threading.Lock()
+
+def shell_worker():
+    """Return the default `ShellWorker`, which is created on first use."""
+    global _shell_worker
+    with _shell_worker_lock:
+        if _shell_worker is None:
+            _shell_worker = ShellWorker()
+            atexit.register(_shell_worker.close)
+    return _shell_worker
+
+
+async def backquote_async(command, shell=None, full_result=False,
+                          silent=False, timeout=None, binary=False):
+    """Run process, return output, like `backquote()`, but as a coroutine.
+
+    The arguments, the result, and the exceptions raised are the same as
+    for `backquote()`.
+
+    """
+    command, run_shell = _prepare_command(command, shell)
+    proc = await asyncio.create_subprocess_exec(
+        *command, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        start_new_session=timeout is not None)
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _signal(proc, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), kill_grace)
+        except asyncio.TimeoutError:
+            _signal(proc, signal.SIGKILL)
+            await proc.wait()
+        raise subprocess.TimeoutExpired(command, timeout)
+    if not binary:
+        out, err = out.decode("utf-8"), err.decode("utf-8")
+    result = (out, err, proc.returncode)
+    return _backquote_result(command, result, run_shell, full_result, silent)
+
+
+async def backquote_many(commands, limit=None, **kwargs):
+    """Run `commands` concurrently with `backquote_async()` (coroutine).
+
+    At most `limit` commands (default: `concurrency_limit`) run at the same
+    time. Other keyword arguments are passed to `backquote_async()`.
+
+    Return a list of the results in the order of `commands`. If a command
+    raises an exception, the exception is in its place in the list.
+
+    """
+    semaphore = asyncio.Semaphore(limit or concurrency_limit)
+
+    async def run(command):
+        async with semaphore:
+            return await backquote_async(command, **kwargs)
+
+    return await asyncio.gather(*map(run, commands), return_exceptions=True)
+
+
+class BatchError(Exception):
+    """Some of the commands run by `backquote_batch()` failed.
+
+    `results` is the list of all results, and `failures` a dict that maps
+    the indexes of the failed commands to their results.
+    """
+    def __init__(self, commands, results, failures):
+        self.commands = commands
+        self.results = results
+        self.failures = failures
+        reasons = []
+        for index, result in list(failures.items())[:batch_errors_shown]:
+            if isinstance(result, Exception):
+                reason = "{}: {}".format(type(result).__name__, result)
+            else:
+                reason = "exit status {}".format(result[2])
+            reasons.append("{!r}: {}".format(commands[index], reason))
+        if len(failures) > batch_errors_shown:
+            reasons.append("...")
+        super().__init__("{} of {} commands failed; {}"
+                         .format(len(failures), len(results),
+                                 "; ".join(reasons)))
+
+
+def _batch_failed(result):
+    """Return true iff `result` from `backquote_batch()` is a failure."""
+    return isinstance(result, Exception) or result[2] != 0
+
+
+def backquote_completed(commands, max_workers=None, timeout=None,
+                        shell=None, check=False):
+    """Run `commands` in parallel, yield their results as they complete.
+
+    Yield tuples of (index, result), where `index` is the position of the
+    command in `commands`. The commands are run with `backquote()` in up to
+    `max_workers` threads (default: `concurrency_limit`); `shell` and
+    `timeout` (per command) are passed to it. A result is a tuple of
+    (stdout, stderr, exit status), or the exception raised by the command,
+    e.g. a `subprocess.TimeoutExpired` or `FileNotFoundError`.
+
+    If `check` is true, raise a `BatchError` after all results have been
+    yielded if any command failed, i.e. has raised an exception or a
+    non-zero exit status.
+
+    """
+    commands = list(commands)
+    results = [None] * len(commands)
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers or concurrency_limit) as executor:
+        futures = {
+            executor.submit(backquote, command, shell=shell,
+                            full_result=True, timeout=timeout): index
+            for index, command in enumerate(commands)
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = e
+                yield index, results[index]
+        finally:
+            executor.shutdown(cancel_futures=True)
+    if check:
+        failures = { index: result for index, result in enumerate(results)
+                     if _batch_failed(result) }
+        if failures:
+            raise BatchError(commands, results, failures)
+
+
+def backquote_batch(commands, max_workers=None, timeout=None, shell=None,
+                    check=False):
+    """Run `commands` in parallel, return the list of their results.
+
+    The results are in the order of `commands`; the arguments and the
+    results are as for `backquote_completed()`. If `check` is true, raise
+    a `BatchError` if any command failed.
+
+    """
+    commands = list(commands)
+    results = [None] * len(commands)
+    for index, result in backquote_completed(commands, max_workers, timeout,
+                                             shell, check):
+        results[index] = result
+    return results
+
+
+def system(command, shell=None, timeout=None, resources=False):
     """Similar to os.system(), but the way I like it.
 
     If command is a tuple or a list, run it directly. Otherwise, make it a
@@ -113,31 +838,24 @@ def system(command, shell=None):
      - If `shell` is otherwise false, split the string into a list and run it
        directly.
 
+    The string is split into a list like the shell does with quotes and
+    backslashes (using `shlex.split()`), but without any expansions.
+
     The standard IO channels are not redirected.
     
     If the called programm cannot be found, an exception will be raised.
 
-    Return the exit status of the command.
-
-    """
-    run_shell = False                   # for testing
-    if not isinstance(command, (list, tuple)):
-        command = str(command)
-        if shell:
-            if shell is True:
-                shell = "/bin/sh"
-            command = [shell, "-c", command]
-            run_shell = True
-        elif shell is None:
-            if any([ ch in shellmeta for ch in command ]):
-                command = ["/bin/sh", "-c", command]
-                run_shell = True
-            else:
-                command = command.split()
-        else:
-            command = command.split()
+    Return the exit status of the command. If `resources` is true, return a
+    tuple of the exit status and the resource usage of the process. For this
+    and for `timeout`, see `backquote()`.
+
+    """
+    command, run_shell = _prepare_command(command, shell)
 
-    with subprocess.Popen(command) as proc:
-        proc.wait()
+    with subprocess.Popen(command,
+                          start_new_session=timeout is not None) as proc:
+        usage = _wait(proc, command, timeout)
         result = proc.returncode
+    if resources:
+        return result, usage
     return result
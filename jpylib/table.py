@@ -1,7 +1,9 @@
 # table generator
 
+import sys
 import jpylib as y
 import functools
+import itertools
 from .table_templates import *
 
 
@@ -17,6 +19,8 @@ _default_params = dict(
     hl_cross=["", ""],
     nl_cross=["", ""],
     data=None,
+    cells=None,
+    widths=None,
 )
 
 class Table:
@@ -24,7 +28,8 @@ class Table:
     def __init__(self, *, corner=None, border=None, hsep=None, vsep=None,
                  tb_cross=None, lb_cross=None, rb_cross=None, bb_cross=None,
                  hl_cross=None, nl_cross=None, cell_pad=[1, 1], pad_char=" ",
-                 template=None, align=None, data=None, rstrip=True, indent=""):
+                 template=None, align=None, data=None, rstrip=True, indent="",
+                 widths=None, columns=None):
         """Initialise a Table formatting parameter set.
         
         Arguments:
@@ -46,9 +51,14 @@ class Table:
                          asterisk at the end means default for following columns
                          is the character in front of the asterisk
         * data:          the data to format, as a sequence of rows, which are
-                         sequences of columns (the data items)
+                         sequences of columns (the data items); alternatively
+                         a dict or 2-D array, see `columns`
         * rstrip:        strip trailing blanks off output lines
         * intend:        a string to lead each output line
+        * widths:        minimum column widths, a sequence of int; with
+                         `stream(lookahead=0)`, they are used as they are
+        * columns:       the data to format, as a sequence of columns (e.g.
+                         NumPy arrays) or a dict of column headings to columns
 
         Parameters are first taken from the template, if any, and
         can then tweaked by the other constructor arguments.
@@ -108,33 +118,103 @@ class Table:
                     self.defaultalign[i] = self.align[i][-2]
                     self.align[i] = self.align[i][:-1]
         # Now incorporate the data, if specified here.
-        if data:
+        if columns is not None:
+            self._fill_columns(columns)
+        elif data is not None:
             self._fill_table(data)
 
 
     def _fill_table(self, data):
         """Assess and store the table data."""
+        if _is_columnar(data):
+            return self._fill_columns(data.T if _is_array(data) else data)
         self.data = data
-        self.cols = 0                   # maximum column number
+        self.cells = []                 # rows of cells, see _row_cells()
+        self.col_width = list(self.widths or []) # max item width per column
+        self.cols = len(self.col_width) # maximum column number
         self.rows = 0                   # maximum row number
-        self.col_width = []             # maximum item width per columns
 
         for row, data_line in enumerate(data):
             self.rows = row + 1
-            for col, data_item in enumerate(data_line):
-                col_width = self.col_width
+            cells = self._row_cells(row, data_line)
+            self.cells.append(cells)
+            for col, cell in enumerate(cells):
                 if col >= self.cols:
                     self.cols = col + 1
                     self.col_width.append(0)
-                self.col_width[col] = \
-                    max(self.col_width[col], len(str(data_item)))
+                if cell[1] > self.col_width[col]:
+                    self.col_width[col] = cell[1]
         return self
 
-    def _padded_item(self, item, width, alignment):
-        """Return a string of the item with left and right padding."""
-        padding = width - len(item)
+    def _fill_columns(self, columns):
+        """Assess and store the table data given as columns.
+
+        `columns` is a sequence of columns, or a dict of column headings to
+        columns. The items are stringified, measured, and checked for being
+        numeric column by column; for NumPy arrays, this is done without
+        looking at each item separately.
+        """
+        self.data = columns
+        header = None
+        if isinstance(columns, dict):
+            header = self._row_cells(0, columns.keys())
+            columns = list(columns.values())
+        first = 1 if header else 0      # row number of the first item
+        self.col_width = list(self.widths or [])
+        col_cells = []
+        for col, column in enumerate(columns):
+            if _is_array(column) and column.dtype.kind in "iufb":
+                # numeric (or bool) dtype, all items of the same kind
+                items = column.astype(str).tolist()
+                nums = itertools.repeat(column.dtype.kind != "b")
+            else:
+                if _is_array(column):
+                    column = column.tolist()
+                elif not y.is_sequence(column):
+                    column = list(column)
+                items = list(map(str, column))
+                if self._alignment(first, col) in (None, "n") \
+                   or self._alignment(1, col) in (None, "n"):
+                    nums = map(_is_numeric, column, items)
+                else:
+                    nums = itertools.repeat(False)
+            widths = list(map(len, items))
+            cells = list(zip(items, widths, nums))
+            width = max(widths, default=0)
+            if header:
+                cells.insert(0, header[col])
+                width = max(width, header[col][1])
+            col_cells.append(cells)
+            if col < len(self.col_width):
+                self.col_width[col] = max(self.col_width[col], width)
+            else:
+                self.col_width.append(width)
+        self.cols = len(self.col_width)
+        self.cells = list(itertools.zip_longest(*col_cells,
+                                                fillvalue=("", 0, False)))
+        self.rows = len(self.cells)
+        return self
+
+    def _row_cells(self, row, data_line):
+        """Return the cells of a data row as (string, width, is_numeric).
+
+        Each data item is stringified only once here; the numeric check is
+        done only where the alignment depends on it.
+        """
+        cells = []
+        for col, data_item in enumerate(data_line):
+            item = str(data_item)
+            cells.append((item, len(item),
+                          self._alignment(row, col) in (None, "n")
+                          and _is_numeric(data_item, item)))
+        return cells
+
+    def _padded_item(self, cell, width, alignment):
+        """Return a string of the cell's item with left and right padding."""
+        item, item_width, is_numeric = cell
+        padding = max(0, width - item_width)
         if alignment in (None, "n"):
-            if y.is_num(item):
+            if is_numeric:
                 alignment = "r"
             else:
                 alignment = "l"                
@@ -151,7 +231,7 @@ class Table:
             raise ValueError("invalid char in alignment: {}"
                              .format(repr(alignment)))
         return (self.pad_char * (lpad + self.cell_pad[0])
-                + str(item)
+                + item
                 + self.pad_char * (self.cell_pad[1] + rpad))
 
     def _vert_sep(self, left_border, right_border, line, cross1, cross2):
@@ -181,34 +261,87 @@ class Table:
         return align[column]
 
 
-    def format(self, data=None):
+    def format(self, data=None, columns=None):
         """Return the formatted Table as a string.
 
+        Table data must be specified here or earlier in the constructor,
+        either as `data` or as `columns`.
+        """
+        if columns is not None:
+            self._fill_columns(columns)
+        elif data is not None:
+            self._fill_table(data)
+        assert self.cells, "Table has no data, so cannot be formatted."
+        return "\n".join(self._format_lines(self.cells))
+
+    def stream(self, data=None, lookahead=100):
+        """Return the formatted Table line by line (generator).
+
+        Other than with `format()`, the data may be any iterable of rows,
+        which is consumed only as far as the output lines are requested. The
+        column widths are determined from the `widths` parameter and the
+        first `lookahead` rows. If a later data item does not fit, it widens
+        its cell, but not the column.
+
         Table data must be specified here or earlier in the constructor.
         """
-        if data:
+        if data is None:
+            # data or columns specified in the constructor, already assessed
+            assert self.data is not None, \
+                "Table has no data, so cannot be formatted."
+            yield from self._format_lines(self.cells)
+            return
+        if _is_columnar(data):
+            # columns cannot be streamed, but need not fail either
             self._fill_table(data)
-        assert self.data, "Table has no data, so cannot be formatted."
-        
-        # Start result with the top border line.
-        result = []
+            yield from self._format_lines(self.cells)
+            return
+        rows = iter(data)
+        head = list(itertools.islice(rows, lookahead))
+        if not head:
+            # no lookahead, but we need to know if there is data at all
+            head = list(itertools.islice(rows, 1))
+            if not head:
+                return
+            self._fill_table([])
+            self.cells = [self._row_cells(0, head[0])]
+        else:
+            self._fill_table(head)
+        first = len(self.cells)
+        yield from self._format_lines(itertools.chain(
+            self.cells,
+            (self._row_cells(row, data_line)
+             for row, data_line in enumerate(rows, first))))
+
+    def _format_lines(self, cells):
+        """Return the formatted lines of the Table for `cells` (generator).
+
+        `cells` are the data rows as returned by `_row_cells()`.
+        """
+        def line_out(line):
+            line = self.indent + line
+            if self.rstrip:
+                line = line.rstrip()
+            return line
+
+        # Start with the top border line.
         tb = self._vert_sep(self.corner[0], self.corner[1], self.border[0],
                             self.tb_cross[0], self.tb_cross[1])
         if tb:
-            result.append(self.indent + tb)
+            yield line_out(tb)
         had_first_row = False
         left_cross, int_cross1, int_cross2, right_cross = (
             self.lb_cross[0], self.hl_cross[0],
             self.hl_cross[1], self.rb_cross[0]
         )
         vsep = self.vsep[0]
-        for row, data_line in enumerate(self.data):
+        for row, row_cells in enumerate(cells):
             # Vertical separator line, if necessary
             if had_first_row:
                 sepline = self._vert_sep(left_cross, right_cross,
                                          vsep, int_cross1, int_cross2)
                 if sepline:
-                    result.append(self.indent + sepline)
+                    yield line_out(sepline)
 
                 left_cross, int_cross1, int_cross2, right_cross = (
                     self.lb_cross[1], self.nl_cross[0],
@@ -222,27 +355,48 @@ class Table:
             had_first_col = False
             hsep = self.hsep[0]
             rline.append(self.border[1])
-            for col, data_item in enumerate(data_line):
+            for col, cell in enumerate(row_cells):
                 if had_first_col:
                     rline.append(hsep)
                     hsep = self.hsep[1]
                 had_first_col = True
-                rline.append(self._padded_item(str(data_item),
-                                               self.col_width[col],
+                # a streamed row may have more columns than seen before
+                width = self.col_width[col] if col < self.cols else 0
+                rline.append(self._padded_item(cell, width,
                                                self._alignment(row, col)))
             rline.append(self.border[2])
-            result.append(self.indent + "".join(rline))
-    
+            yield line_out("".join(rline))
+
         # bottom border
         bb = self._vert_sep(self.corner[2], self.corner[3],
                             self.border[3], *self.bb_cross)
         if bb:
-            result.append(self.indent + bb)
-        for lino, line in enumerate(result):
-            if self.rstrip:
-                line = line.rstrip()
-                result[lino] = line
-        return "\n".join(result)
+            yield line_out(bb)
+
+def _is_array(data):
+    """Return True iff `data` looks like a NumPy array."""
+    return hasattr(data, "ndim") and hasattr(data, "dtype")
+
+
+def _is_columnar(data):
+    """Return True iff `data` is a dict of columns or a 2-D array."""
+    return isinstance(data, dict) or _is_array(data) and data.ndim == 2
+
+
+def _is_numeric(data_item, item):
+    """Return True iff `item`, the string of `data_item`, represents a number.
+
+    This is the same as `y.is_num(item)`, but avoids the conversion attempts
+    for data items that are numbers anyway.
+    """
+    if type(data_item) in (int, float):
+        return True
+    try:
+        float(item)
+        return True
+    except ValueError:
+        return False
+
 
 def format_table(data=None, template_name=None, template=None, **kwargs):
     """Format a table from the specified data and (optional) template.
@@ -256,7 +410,7 @@ def format_table(data=None, template_name=None, template=None, **kwargs):
     to the Table constructor (see there).
 
     """
-    if data is None:
+    if data is None and kwargs.get("columns") is None:
         data = example_data
     if template is None:
         template = get_template(template_name)
@@ -264,4 +418,28 @@ def format_table(data=None, template_name=None, template=None, **kwargs):
     return table.format()
 
 
+def print_table(data=None, template_name=None, template=None, file=None,
+                lookahead=100, **kwargs):
+    """Print a table from the specified data and (optional) template.
+
+    Other than `format_table()`, this prints the table line by line to
+    `file` (default: `sys.stdout`) while the data is consumed, so `data`
+    may be any iterable of rows, e.g. a generator. The column widths are
+    determined from the first `lookahead` rows and the minimum `widths`
+    parameter to the Table constructor, if specified (see `Table.stream()`).
+
+    The template and the kwargs are used as with `format_table()`.
+
+    """
+    if data is None and kwargs.get("columns") is None:
+        data = example_data
+    if template is None:
+        template = get_template(template_name)
+    if file is None:
+        file = sys.stdout
+    table = Table(template=template, **kwargs)
+    for line in table.stream(data, lookahead=lookahead):
+        print(line, file=file)
+
+
 # EOF
@@ -2,6 +2,52 @@
 # (I can never remember them, so I'll have my own.)
 
 from datetime import datetime
+from time import time_ns, monotonic_ns
+
+
+class CachedTimeFormatter:
+    """Format the current time, reusing the formatted second until it changes.
+
+    The whole seconds are formatted with the strftime `format`, followed by a
+    dot and `digits` digits of the fraction of the second, if `digits` is not
+    zero. With `monotonic`, the time is taken from the monotonic clock, offset
+    to the wall clock time at creation, so it does not jump when the system
+    time is set (but does not follow it, either).
+
+    """
+    def __init__(self, format, digits=0, monotonic=False):
+        if not 0 <= digits <= 9:
+            raise ValueError("digits not in 0..9: {}".format(digits))
+        self.format = format
+        self.digits = digits
+        self._divisor = 10**(9 - digits)
+        self._suffix = ".{{:0{}d}}".format(digits) if digits else ""
+        self.offset = time_ns() - monotonic_ns() if monotonic else None
+        self._cached = (None, None)
+
+    def __call__(self):
+        """Return the current time formatted."""
+        if self.offset is None:
+            now = time_ns()
+        else:
+            now = self.offset + monotonic_ns()
+        second, fraction = divmod(now, 1000000000)
+        cached_second, prefix = self._cached
+        if second != cached_second:
+            prefix = datetime.fromtimestamp(second).strftime(self.format)
+            self._cached = (second, prefix)
+        return prefix + self._suffix.format(fraction // self._divisor)
+
+
+# cached formatters for the current time, by format and digits
+_formatters = {}
+
+def _now(format, digits):
+    formatter = _formatters.get((format, digits))
+    if formatter is None:
+        formatter = CachedTimeFormatter(format, digits)
+        _formatters[(format, digits)] = formatter
+    return formatter()
 
 
 def time_format(format, time):
@@ -11,21 +57,30 @@ def time_format(format, time):
 
 
 def isotime(time=None):
+    if time is None:
+        return _now("%Y%m%d:%H%M%S", 0)
     return time_format("%Y%m%d:%H%M%S", time)
 
 
 def isotime_ms(time=None):
+    if time is None:
+        return _now("%Y%m%d:%H%M%S", 3)
     return time_format("%Y%m%d:%H%M%S.%f", time)[:-3]
 
 
 def iso_time(time=None, sep="T"):
+    if time is None:
+        return _now("%Y-%m-%d{}%H:%M:%S".format(sep), 0)
     return time_format("%Y-%m-%d{}%H:%M:%S".format(sep), time)
 
 
 def iso_time_us(time=None, sep="T"):
+    if time is None:
+        return _now("%Y-%m-%d{}%H:%M:%S".format(sep), 6)
     return time_format("%Y-%m-%d{}%H:%M:%S.%f".format(sep), time)
 
 
 def iso_time_ms(time=None, sep="T"):
+    if time is None:
+        return _now("%Y-%m-%d{}%H:%M:%S".format(sep), 3)
     return time_format("%Y-%m-%d{}%H:%M:%S.%f".format(sep), time)[:-3]
-
@@ -46,7 +46,7 @@ def do_command(command, source):
 
     """
     os.environ["SOURCE"] = source
-    output = y.backquote(command)
+    output = y.backquote(command, worker=True)
     if output.endswith("\n"):
         terminate = ""
     else:
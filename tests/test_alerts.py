@@ -2,6 +2,12 @@
 
 from jpylib import *
 from jpylib.alerts import *
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
 import unittest
 
 # alerts tests
@@ -186,6 +192,12 @@ DBG VAR c: 'this is a testthis is a testthis is a test'\n""")
         self.assertTrue(value.endswith("terminal\n"))
         self.assertTrue(value.startswith(y.isotime()))
 
+    def test_info_timestamp_monotonic(self):
+        alert_config(timestamps="monotonic")
+        with outputCaptured() as (out, err):
+            notice("terminal")
+        self.assertRegex(err.getvalue(), r"^\d{8}:\d{6} terminal\n$")
+
     def test_debug(self):
         alert_init(level=L_TRACE)
         with outputCaptured() as (out, err):
@@ -305,4 +317,361 @@ DBG VAR c: 'this is a testthis is a testthis is a test'\n""")
         except NotImplementedError:
             pass
         self.assertEqual(y.alert_level(), the_level)
-            
+
+    def test_temp_alert_level_threads(self):
+        entered = threading.Event()
+        done = threading.Event()
+        def worker():
+            with temporary_alert_level(L_DEBUG):
+                entered.set()
+                debug("in worker")
+                done.wait()
+        with outputCaptured() as (out, errout):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            entered.wait()
+            self.assertEqual(alert_level(), L_NOTICE)
+            debug("in main")
+            self.assertFalse(is_debug())
+            done.set()
+            thread.join()
+        self.assertEqual(errout.getvalue(), "DBG in worker\n")
+        self.assertEqual(y.alerts._overrides, 0)
+
+    def test_temp_alert_level_tasks(self):
+        async def task(level, name):
+            with temporary_alert_level(level):
+                await asyncio.sleep(0.01)
+                info(name)
+                alert_level_up()
+                await asyncio.sleep(0.01)
+                debug(name)
+        async def main():
+            await asyncio.gather(task(L_INFO, "one"), task(L_NOTICE, "two"))
+        with outputCaptured() as (out, errout):
+            asyncio.run(main())
+        self.assertEqual(errout.getvalue(), "one\nDBG one\n")
+        self.assertEqual(alert_level(), L_NOTICE)
+
+    def test_atomic_lines(self):
+        with tempfile.TemporaryFile("w+") as f:
+            alert_redirect(L_NOTICE, f)
+            def worker(n):
+                for i in range(200):
+                    notice(str(n) * 1000, i)
+            threads = [threading.Thread(target=worker, args=(n,))
+                       for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            f.seek(0)
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 8 * 200)
+        for line in lines:
+            self.assertRegex(line, r"^(\d)\1{999} \d+$")
+
+    def test_fork(self):
+        with tempfile.TemporaryFile("w+") as f:
+            alert_config(batch_size=10)
+            alert_redirect(L_NOTICE, f)
+            notice("parent")
+            pid = os.fork()
+            if pid == 0:
+                notice("child")
+                alert_flush()
+                os._exit(0)
+            os.waitpid(pid, 0)
+            alert_flush()
+            f.seek(0)
+            self.assertEqual(f.read(), "child\nparent\n")
+
+    def test_fork_overrides(self):
+        entered = threading.Event()
+        done = threading.Event()
+        def worker():
+            with temporary_alert_level(L_DEBUG):
+                entered.set()
+                done.wait()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        entered.wait()
+        try:
+            with tempfile.TemporaryFile("w+") as f:
+                alert_config(prebind=True)
+                alert_redirect(L_NOTICE, f)
+                with temporary_alert_level(L_INFO):
+                    self.assertEqual(y.alerts._overrides, 2)
+                    pid = os.fork()
+                    if pid == 0:
+                        notice("in", y.alerts._overrides)
+                        with temporary_alert_level(L_INFO):
+                            notice("nested", y.alerts._overrides)
+                if pid == 0:
+                    notice("out", y.alerts._overrides,
+                           y.alerts.debug is y.alerts._no_alert)
+                    alert_flush()
+                    os._exit(0)
+                os.waitpid(pid, 0)
+                f.seek(0)
+                self.assertEqual(f.read(), "in 1\nnested 2\nout 0 True\n")
+        finally:
+            done.set()
+            thread.join()
+
+
+    def test_background(self):
+        alert_config(background=True, level=L_DEBUG)
+        try:
+            with outputCaptured() as (out, err):
+                for i in range(100):
+                    debug("message", i)
+                alert_flush()
+            self.assertEqual(err.getvalue(),
+                             "".join("DBG message {}\n".format(i)
+                                     for i in range(100)))
+        finally:
+            alert_config(background=False)
+        self.assertIsNone(y.alerts._alert_queue)
+
+    def test_background_start_threads(self):
+        alert_config(background=True)
+        barrier = threading.Barrier(8)
+        def worker(n):
+            barrier.wait()
+            notice("thread", n)
+        try:
+            with outputCaptured() as (out, errout):
+                threads = [threading.Thread(target=worker, args=(n,))
+                           for n in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                alert_flush()
+            self.assertEqual(sorted(errout.getvalue().splitlines()),
+                             ["thread {}".format(n) for n in range(8)])
+            self.assertEqual([thread.name for thread in threading.enumerate()]
+                             .count("alert writer"), 1)
+        finally:
+            alert_config(background=False)
+
+    def test_background_overflow(self):
+        class SlowFile:
+            def __init__(self):
+                self.lines = []
+                self.go = threading.Event()
+            def write(self, s):
+                self.go.wait()
+                self.lines.append(s)
+            def flush(self):
+                pass
+
+        for overflow, expect in (("drop", "0\n1\n"),
+                                 ("drop_oldest", "0\n9\n")):
+            slow = SlowFile()
+            alert_config(background=True, queue_size=1, overflow=overflow)
+            alert_redirect(L_NOTICE, slow)
+            try:
+                notice(0)
+                # wait until the writer is blocked writing message 0
+                while y.alerts._alert_queue.qsize():
+                    time.sleep(0.01)
+                for i in range(1, 10):
+                    notice(i)
+                self.assertEqual(alcf().alerts_dropped, 8)
+                slow.go.set()
+                alert_flush()
+                self.assertEqual("".join(slow.lines), expect)
+            finally:
+                alert_init()
+
+        with self.assertRaises(ValueError):
+            alert_config(overflow="explode")
+
+    def test_background_fatal(self):
+        alert_config(background=True)
+        try:
+            with outputAndExitCaptured() as (out, err, status):
+                fatal("too bad!")
+            self.assertTrue(err.getvalue().endswith(" too bad!\n"))
+            self.assertEqual(status.value, 1)
+        finally:
+            alert_init()
+
+    def test_prebind(self):
+        real_debug = y.alerts.debug
+        alert_config(prebind=True, level=L_INFO)
+        try:
+            self.assertIsNot(y.debug, real_debug)
+            self.assertIs(y.debugf, y.alerts.debugf)
+            self.assertIs(y.info, y.alerts._alert_functions["info"])
+            with outputCaptured() as (out, err):
+                y.debug("not printed")
+                y.debugf("not {}", "printed")
+                y.alerts.trace("not printed")
+                y.info("printed")
+                y.debug_vars("real_debug")
+            self.assertEqual(err.getvalue(), "printed\n")
+
+            alert_level_up()
+            self.assertIs(y.debug, real_debug)
+            with outputCaptured() as (out, err):
+                y.debug("printed")
+                y.trace("not printed")
+            self.assertEqual(err.getvalue(), "DBG printed\n")
+
+            with temporary_alert_level(L_TRACE):
+                with outputCaptured() as (out, err):
+                    y.trace("printed")
+                self.assertEqual(err.getvalue(), "TRC printed\n")
+            self.assertIsNot(y.trace, y.alerts._alert_functions["trace"])
+
+            alert_level_zero()
+            with outputCaptured() as (out, err):
+                y.notice("not printed")
+                y.err("printed")
+            self.assertTrue(err.getvalue().endswith("Error: printed\n"))
+
+            def callee(a):
+                return a
+            self.assertIs(tracefn(callee), callee)
+        finally:
+            alert_init()
+        self.assertIs(y.debug, real_debug)
+        self.assertIs(y.alerts.debug, real_debug)
+        self.assertIsNot(tracefn(callee), callee)
+
+    def test_decoration_prepared(self):
+        alert_config(program="prog1")
+        with outputCaptured() as (out, errout):
+            err("bad")
+        self.assertEqual(errout.getvalue(), "prog1: Error: bad\n")
+        alert_config(program="prog2", decoration=["{cfg.program}: E:", None,
+                                                  "INF", "DBG", "TRC"],
+                     level=L_INFO)
+        with outputCaptured() as (out, errout):
+            error("bad")
+            info("so")
+        self.assertEqual(errout.getvalue(), "prog2: E: bad\nINF so\n")
+
+        # streams are looked up for each alert, other files are not
+        with outputCaptured() as (out, errout):
+            alert_redirect(L_INFO, 1)
+            info("to stdout")
+        self.assertEqual(out.getvalue(), "INF to stdout\n")
+        with outputCaptured() as (out, errout):
+            info("to stdout again")
+        self.assertEqual(out.getvalue(), "INF to stdout again\n")
+        with outputCaptured() as (out, errout):
+            alert_redirect(L_INFO, sys.stderr)
+        with outputCaptured() as (out2, errout2):
+            info("to the first stderr")
+        self.assertEqual(errout.getvalue(), "INF to the first stderr\n")
+        self.assertEqual(errout2.getvalue(), "")
+
+    def test_record_format(self):
+        alert_config(record_format="json", program="prog",
+                     timestamps=lambda: "T0")
+        with outputCaptured() as (out, errout):
+            notice("hello", "\"world\"")
+        self.assertEqual(json.loads(errout.getvalue()),
+                         dict(time="T0", level="L_NOTICE", program="prog",
+                              message="hello \"world\""))
+        alert_config(record_format="logfmt")
+        with outputCaptured() as (out, errout):
+            error("bad")
+            notice("a=b")
+        self.assertEqual(errout.getvalue(),
+                         "time=T0 level=L_ERROR program=prog message=bad\n"
+                         "time=T0 level=L_NOTICE program=prog"
+                         " message=\"a=b\"\n")
+        self.assertRaises(ValueError, alert_config, record_format="xml")
+
+    def test_record_timestamp_once(self):
+        calls = []
+        def timestamps():
+            calls.append(None)
+            return "T{}".format(len(calls))
+        alert_config(record_format="json", timestamps=timestamps)
+        with outputCaptured() as (out, errout):
+            notice("one")
+            notice("two")
+        self.assertEqual([json.loads(line)["time"]
+                          for line in errout.getvalue().splitlines()],
+                         ["T1", "T2"])
+
+    def test_batch(self):
+        alert_config(batch_size=3)
+        with outputCaptured() as (out, errout):
+            for i in range(4):
+                notice(i)
+            self.assertEqual(errout.getvalue(), "0\n1\n2\n")
+            alert_flush()
+            self.assertEqual(errout.getvalue(), "0\n1\n2\n3\n")
+
+    def test_batch_interval(self):
+        alert_config(background=True, batch_size=100, batch_interval=0.05)
+        try:
+            with outputCaptured() as (out, errout):
+                notice("early")
+                time.sleep(0.5)
+                self.assertEqual(errout.getvalue(), "early\n")
+        finally:
+            alert_config(background=False)
+
+    def test_rate_limit(self):
+        alert_config(rate_limit=2, rate_window=60)
+        with outputCaptured() as (out, errout):
+            for i in range(10):
+                notice("same")
+                notice("other", i)
+            alert_flush()
+        self.assertEqual(errout.getvalue(),
+                         "same\nother 0\nsame\n"
+                         + "".join("other {}\n".format(i) for i in range(1, 10))
+                         + "same (repeated 8 more times)\n")
+
+    def test_rate_limit_window(self):
+        alert_config(rate_limit=1, rate_window=0.05)
+        with outputCaptured() as (out, errout):
+            for i in range(3):
+                notice("same")
+            time.sleep(0.1)
+            notice("same")
+        self.assertEqual(errout.getvalue(),
+                         "same\nsame (repeated 2 more times)\nsame\n")
+
+    def test_rate_limit_site(self):
+        alert_config(rate_limit=1, rate_window=60, rate_key="site")
+        with outputCaptured() as (out, errout):
+            for i in range(5):
+                notice("at site", i)
+            notice("elsewhere")
+            alert_flush()
+        self.assertEqual(errout.getvalue(),
+                         "at site 0\nelsewhere\n"
+                         "at site 4 (repeated 4 more times)\n")
+        self.assertRaises(ValueError, alert_config, rate_key="moon")
+
+    def test_rate_limit_many(self):
+        alert_config(rate_limit=1, rate_window=60)
+        max_entries = y.alerts.rate_entries_max
+        y.alerts.rate_entries_max = 10
+        try:
+            with outputCaptured() as (out, errout):
+                notice("storm")
+                notice("storm")
+                start = time.monotonic()
+                for i in range(20000):
+                    notice("err", i)
+                elapsed = time.monotonic() - start
+                self.assertEqual(len(y.alerts._rate_state), 10)
+                alert_flush()
+        finally:
+            y.alerts.rate_entries_max = max_entries
+        lines = errout.getvalue().splitlines()
+        self.assertEqual(lines[:2], ["storm", "err 0"])
+        self.assertIn("storm (repeated 1 more times)", lines)
+        self.assertEqual(len(lines), 20000 + 2)
+        self.assertLess(elapsed, 5)
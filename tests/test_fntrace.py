@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 
 from jpylib import *
+import jpylib.fntrace
 
+import re
+import time
+import threading
 import unittest
 
 
@@ -32,3 +36,76 @@ class FNTraceTestcase(unittest.TestCase):
         self.assertEqual(err.getvalue(),
                          "TRC call nothing(4, '/usr/bin/', 19, {7},"
                          " smoke='mirrors', cloak='dagger')\n")
+
+    def test_sample(self):
+        alert_level(L_TRACE)
+        with outputCaptured() as (out, err):
+            @tracefn(sample=3)
+            def callee(n):
+                return n
+            for i in range(7):
+                callee(i)
+        self.assertEqual(err.getvalue(), "TRC call callee(0)\n"
+                         "TRC call callee(3)\nTRC call callee(6)\n")
+
+    def test_stats(self):
+        alert_level(L_NOTICE)
+        trace_stats(reset=True)
+
+        @tracefn(stats=True)
+        def inner():
+            time.sleep(0.01)
+
+        @tracefn(stats=True)
+        def outer(n):
+            time.sleep(0.02)
+            for i in range(n):
+                inner()
+            if n:
+                outer(n - 1)
+
+        outer(2)
+        threads = [threading.Thread(target=inner) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = trace_stats()
+        s_outer = stats[__name__ + ".FNTraceTestcase.test_stats.<locals>.outer"]
+        s_inner = stats[__name__ + ".FNTraceTestcase.test_stats.<locals>.inner"]
+        self.assertEqual(s_outer.calls, 3)
+        self.assertEqual(s_inner.calls, 5)
+        self.assertGreaterEqual(s_outer.cumulative, 0.09)
+        self.assertLess(s_outer.cumulative, s_outer.own + s_inner.cumulative)
+        self.assertGreaterEqual(s_outer.own, 0.06)
+        self.assertLess(s_outer.own, s_outer.cumulative - 0.02)
+        self.assertGreaterEqual(s_inner.own, 0.05)
+
+        with outputCaptured() as (out, err):
+            trace_report(reset=True)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(re.split(r"\s\s+", lines[0].strip()),
+                         ["function", "calls", "cumulative", "own", "us/call"])
+        self.assertTrue(lines[1].split()[0].endswith("outer"))
+        self.assertEqual(lines[1].split()[1], "3")
+        self.assertEqual(trace_stats(), {})
+
+    def test_stats_ended_threads(self):
+        trace_stats(reset=True)
+
+        @tracefn(stats=True)
+        def work():
+            pass
+
+        for i in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        self.assertLessEqual(len(jpylib.fntrace._thread_stats), 2)
+        name = (__name__
+                + ".FNTraceTestcase.test_stats_ended_threads.<locals>.work")
+        self.assertEqual(trace_stats()[name].calls, 50)
+        self.assertTrue(all(thread.is_alive() for thread, table
+                            in jpylib.fntrace._thread_stats))
+        self.assertEqual(trace_stats(reset=True)[name].calls, 50)
+        self.assertEqual(trace_stats(), {})
@@ -5,7 +5,13 @@ import jpylib as y
 import os
 import re
 import sys
+import bz2
+import array
+import shutil
+import gzip
+import lzma
 import unittest
+import tempfile
 import collections
 
 files = ["examples/testdata/input_lines_a",
@@ -96,6 +102,140 @@ class IOHelperTestcase(unittest.TestCase):
         self.assertEqual(handler_run,
                          "handled examples/testdata/input_lines_nonex")
 
+    def test_input_lines_prefetch(self):
+        fnames = files * 5
+        expect = list(y.all_input_lines(fnames))
+        for prefetch in (1, 2, 20):
+            self.assertEqual(list(y.all_input_lines(fnames, prefetch=prefetch)),
+                             expect)
+            self.assertEqual(
+                collections.Counter(y.all_input_lines(fnames, ordered=False,
+                                                      prefetch=prefetch)),
+                collections.Counter(expect))
+
+    def test_input_lines_prefetch_stdin(self):
+        with open(fstdin) as stdin:
+            with y.inputFrom(stdin):
+                data = list(y.all_input_lines(["-", files[0]], prefetch=2))
+        self.assertEqual(data[0], "prplfrps\n")
+        self.assertEqual(data[1:], list(y.all_input_lines([files[0]])))
+
+    def test_input_lines_prefetch_errors(self):
+        result = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff",] * 2
+        handled = []
+        data = list(map(str.strip, y.all_input_lines(
+            nonex + nonex, lambda fname, e: handled.append(fname),
+            prefetch=3)))
+        self.assertEqual(data, result)
+        self.assertEqual(handled, nonex[1:] * 2)
+        with self.assertRaises(FileNotFoundError) as err:
+            data = list(y.all_input_lines(nonex, prefetch=2))
+        data = list(map(str.strip, y.all_input_lines(nonex, ign_fnf=True,
+                                                     prefetch=2)))
+        self.assertEqual(data, result[:6])
+
+    def test_input_lines_binary(self):
+        expect = [line.encode() for line in y.all_input_lines(files)]
+        self.assertEqual(list(y.all_input_lines(files, binary=True)), expect)
+        self.assertEqual(list(y.all_input_lines(files, binary=True,
+                                                prefetch=2)), expect)
+        with open(fstdin, "rb") as stdin:
+            with y.inputFrom(stdin):
+                data = list(y.all_input_lines(binary=True))
+        self.assertEqual(data, [b"prplfrps\n"])
+
+    def test_input_lines_encoding(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "latin1")
+            with open(fname, "wb") as f:
+                f.write("Grüße\nmañana\n".encode("latin-1"))
+            with self.assertRaises(UnicodeDecodeError):
+                list(y.all_input_lines([fname], encoding="utf-8"))
+            self.assertEqual(list(y.all_input_lines([fname],
+                                                    encoding="latin-1")),
+                             ["Grüße\n", "mañana\n"])
+            self.assertEqual(list(y.all_input_lines([fname], encoding="utf-8",
+                                                    errors="replace")),
+                             ["Gr\ufffd\ufffde\n", "ma\ufffdana\n"])
+
+    def test_input_lines_mmap(self):
+        expect = list(y.all_input_lines(files))
+        self.assertEqual(list(y.all_input_lines(files, use_mmap=True)),
+                         expect)
+        self.assertEqual(list(y.all_input_lines(files, use_mmap=True,
+                                                binary=True)),
+                         [line.encode() for line in expect])
+        views = list(y.all_input_lines(files, use_mmap="memoryview"))
+        self.assertTrue(all(isinstance(v, memoryview) for v in views))
+        self.assertEqual([bytes(v) for v in views],
+                         [line.encode() for line in expect])
+
+    def test_input_lines_mmap_special(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            empty = os.path.join(tmpdir, "empty")
+            open(empty, "w").close()
+            noeol = os.path.join(tmpdir, "noeol")
+            with open(noeol, "w") as f:
+                f.write("one\ntwo")
+            self.assertEqual(list(y.all_input_lines([empty, noeol],
+                                                    use_mmap=True)),
+                             ["one\n", "two"])
+        with open(fstdin) as stdin:
+            with y.inputFrom(stdin):
+                data = list(y.all_input_lines(["-", "/dev/null"],
+                                              use_mmap=True))
+        self.assertEqual(data, ["prplfrps\n"])
+
+    def test_input_lines_decompress(self):
+        lines = ["line {} {}\n".format(i, "x" * (i % 97)) for i in range(20000)]
+        data = "".join(lines).encode()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fnames = []
+            for module, suffix in ((gzip, "gz"), (bz2, "bz2"), (lzma, "xz")):
+                fname = os.path.join(tmpdir, "lines." + suffix)
+                with open(fname, "wb") as f:
+                    f.write(module.compress(data))
+                fnames.append(fname)
+            fnames.append(files[0])
+            expect = lines * 3 + list(y.all_input_lines(files[:1]))
+            for decompress in (True, "thread"):
+                self.assertEqual(list(y.all_input_lines(
+                    fnames, decompress=decompress)), expect)
+                self.assertEqual(list(y.all_input_lines(
+                    fnames, decompress=decompress, binary=True)),
+                                 [line.encode() for line in expect])
+                self.assertEqual(list(y.all_input_lines(
+                    fnames, decompress=decompress, prefetch=2)), expect)
+                self.assertEqual(list(y.all_input_lines(
+                    fnames, decompress=decompress, use_mmap=True)), expect)
+            # not decompressing
+            with self.assertRaises(UnicodeDecodeError):
+                list(y.all_input_lines(fnames[:1], encoding="utf-8"))
+            # stop reading early
+            for line in y.all_input_lines(fnames, decompress="thread"):
+                break
+            with open(fnames[0], encoding="latin-1") as stdin:
+                with y.inputFrom(stdin):
+                    self.assertEqual(list(y.all_input_lines(
+                        decompress=True)), lines)
+
+    def test_input_lines_decompress_zstd(self):
+        try:
+            from compression import zstd
+            compress = zstd.compress
+        except ImportError:
+            try:
+                import zstandard
+                compress = zstandard.ZstdCompressor().compress
+            except ImportError:
+                self.skipTest("no zstd module available")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "lines.zst")
+            with open(fname, "wb") as f:
+                f.write(compress(b"a\nb\n"))
+            self.assertEqual(list(y.all_input_lines([fname], decompress=True)),
+                             ["a\n", "b\n"])
+
 
 class ReadItemsTestcase(unittest.TestCase):
 
@@ -106,6 +246,56 @@ class ReadItemsTestcase(unittest.TestCase):
         # y.debug("result", result)
         self.assertEqual(result, expect)
 
+    def test_read_items_many(self):
+        expect = "one two three five seven nine ten".split()
+        fnames = ["lib/items"] * 3
+        self.assertEqual(list(y.read_items(fnames)), expect * 3)
+        self.assertEqual(list(y.read_items(fnames, prefetch=2)), expect * 3)
+
+    def test_read_items_binary(self):
+        fname = "lib/items.left"
+        for kwargs in (dict(), dict(lstrip=",."), dict(rstrip=",.\t"),
+                       dict(rstrip=False, strip_newline=False),
+                       dict(comments_re="//"), dict(skip_empty=False)):
+            expect = [item.encode() for item in y.read_items(fname, **kwargs)]
+            self.assertEqual(list(y.read_items(fname, binary=True, **kwargs)),
+                             expect)
+
+    def test_read_items_mmap(self):
+        fname = "lib/items.left"
+        self.assertEqual(list(y.read_items(fname, use_mmap=True)),
+                         list(y.read_items(fname)))
+        self.assertEqual(list(y.read_items(fname, use_mmap=True,
+                                           binary=True)),
+                         list(y.read_items(fname, binary=True)))
+        with self.assertRaises(ValueError):
+            list(y.read_items(fname, use_mmap="memoryview"))
+
+    def test_read_item_chunks(self):
+        for fname in ("lib/items", "lib/items.left", "lib/items.comments",
+                      files):
+            for kwargs in (dict(), dict(lstrip=",."), dict(rstrip=",.\t"),
+                           dict(lstrip=False), dict(rstrip=False),
+                           dict(rstrip=False, strip_newline=False),
+                           dict(rstrip=",.", strip_newline=False),
+                           dict(comments_re="//"), dict(comments_re="\\A#"),
+                           dict(comments_re=False),
+                           dict(skip_empty=False), dict(binary=True)):
+                expect = list(y.read_items(fname, **kwargs))
+                for chunk_size in (1, 7, 1000):
+                    chunks = list(y.read_item_chunks(fname,
+                                                     chunk_size=chunk_size,
+                                                     **kwargs))
+                    self.assertTrue(all(chunks))
+                    self.assertEqual(sum(chunks, []), expect,
+                                     (fname, kwargs, chunk_size))
+
+    def test_read_item_chunks_nonex(self):
+        with self.assertRaises(FileNotFoundError):
+            list(y.read_item_chunks(nonex))
+        self.assertEqual(sum(y.read_item_chunks(nonex, ign_fnf=True), []),
+                         list(y.read_items(nonex[0])))
+
     def test_read_items_no_empty(self):
         expect = ["one",
                   "two",
@@ -236,6 +426,16 @@ class ReadItemsTestcase(unittest.TestCase):
         tested = y.read_mapping(dnsfile, comments_re="^\\s*;;")
         self.assertEqual(themap, tested)
 
+    def test_read_mapping_binary(self):
+        themap = { k.encode(): v.encode()
+                   for k, v in read_map(dnsfile, comments_re="^\\s*;;").items() }
+        tested = y.read_mapping(dnsfile, comments_re="^\\s*;;", binary=True)
+        self.assertEqual(themap, tested)
+        themap = { k.encode(): v.encode()
+                   for k, v in read_map(mapfile, sep="\t").items() }
+        tested = y.read_mapping(mapfile, sep="\t", binary=True)
+        self.assertEqual(themap, tested)
+
     def test_read_mapping_no_skip(self):
         with self.assertRaises(ValueError):
             themap = read_map(dnsfile_b, comments_re="^\\s*;;")
@@ -249,3 +449,94 @@ class ReadItemsTestcase(unittest.TestCase):
                                 skip_fails=True)
         self.assertEqual(themap, tested)
 
+
+
+class MappingFileTestcase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, "mapping")
+        with open(mapfile) as src, open(self.fname, "w") as dst:
+            dst.write(src.read())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def check_mapping(self, **kwargs):
+        expect = y.read_mapping(self.fname)
+        mapping = y.MappingFile(self.fname, **kwargs)
+        self.assertEqual(dict(mapping), expect)
+        self.assertEqual(len(mapping), len(expect))
+        for key, value in expect.items():
+            self.assertEqual(mapping[key], value)
+        self.assertNotIn("no such key", mapping)
+        with self.assertRaises(KeyError):
+            mapping["no such key"]
+
+        # change the file, expect a reload
+        with open(self.fname, "a") as f:
+            f.write("new_key   new value\n")
+        self.assertEqual(mapping["new_key"], "new value")
+        self.assertEqual(len(mapping), len(expect) + 1)
+        mapping.close()
+        return mapping
+
+    def test_mapping_file(self):
+        self.check_mapping()
+
+    def test_mapping_file_index(self):
+        self.check_mapping(index=True)
+        index = self.fname + ".index"
+        self.assertTrue(os.path.exists(index))
+        mtime = os.stat(index).st_mtime_ns
+        # a fresh instance uses the existing index
+        mapping = y.MappingFile(self.fname, index=index)
+        self.assertEqual(dict(mapping), y.read_mapping(self.fname))
+        mapping.close()
+        self.assertEqual(os.stat(index).st_mtime_ns, mtime)
+
+    def test_mapping_file_index_truncated(self):
+        index = self.fname + ".index"
+        mapping = y.MappingFile(self.fname, index=index)
+        len(mapping)
+        mapping.close()
+        size = os.path.getsize(index)
+        with open(index, "r+b") as f:
+            self.assertIn(sys.byteorder.encode(), f.readline())
+            f.truncate(size - 3)
+        mapping = y.MappingFile(self.fname, index=index)
+        self.assertEqual(dict(mapping), y.read_mapping(self.fname))
+        mapping.close()
+        self.assertEqual(os.path.getsize(index), size)
+
+        # also if cut at an item boundary
+        with open(index, "r+b") as f:
+            f.truncate(size - array.array("q").itemsize)
+        mapping = y.MappingFile(self.fname, index=index)
+        self.assertEqual(dict(mapping), y.read_mapping(self.fname))
+        mapping.close()
+        self.assertEqual(os.path.getsize(index), size)
+
+    def test_mapping_file_index_params(self):
+        shutil.copy(dnsfile_b, self.fname)
+        with self.assertRaises(ValueError):
+            y.MappingFile(self.fname, index=True, comments_re="^\\s*;;")["x"]
+        mapping = y.MappingFile(self.fname, index=True, skip_fails=True,
+                                comments_re="^\\s*;;")
+        self.assertEqual(dict(mapping),
+                         y.read_mapping(self.fname, skip_fails=True,
+                                        comments_re="^\\s*;;"))
+        mapping.close()
+
+    def test_mapping_file_interval(self):
+        mapping = y.MappingFile(self.fname, check_interval=3600)
+        length = len(mapping)
+        with open(self.fname, "a") as f:
+            f.write("new_key   new value\n")
+        self.assertEqual(len(mapping), length)
+
+    def test_cached_mapping(self):
+        mapping = y.cached_mapping(self.fname)
+        self.assertIs(y.cached_mapping(self.fname), mapping)
+        self.assertIsNot(y.cached_mapping(self.fname, sep=" "), mapping)
+        self.assertEqual(dict(mapping), y.read_mapping(self.fname))
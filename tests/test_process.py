@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import time
+import tempfile
+import asyncio
+import subprocess
 import jpylib as y
 from jpylib import *
 
@@ -87,3 +91,332 @@ class ProcessTestcase(unittest.TestCase):
         with self.assertRaises(ChildProcessError):
             backquote("echo doodeedoo; exit 13")
         backquote("echo doodeedoo; exit 13", silent=True)
+
+    def test_async(self):
+        self.assertEqual(asyncio.run(backquote_async("echo dorp")), "dorp\n")
+        self.assertEqual(asyncio.run(backquote_async(["echo", "dami$_"])),
+                         "dami$_\n")
+        self.assertEqual(asyncio.run(backquote_async("echo doodeedoo; exit 13",
+                                                     full_result=True)),
+                         ("doodeedoo\n", "", 13))
+        self.assertTrue(asyncio.run(backquote_async("echo doo | cat",
+                                                    full_result="plus"))[1])
+        with self.assertRaises(ChildProcessError):
+            asyncio.run(backquote_async("echo doodeedoo 1>&2"))
+        self.assertEqual(asyncio.run(backquote_async("echo doodeedoo 1>&2",
+                                                     silent=True)), "")
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(backquote_async("exit 13"))
+
+    def test_many(self):
+        commands = ["sleep 0.{}; echo {}".format(n, n) for n in range(5, 0, -1)]
+        commands.append("echo dumdi; exit 1")
+        start = time.time()
+        results = asyncio.run(backquote_many(commands))
+        self.assertLess(time.time() - start, 1.5)
+        self.assertEqual(results[:5], ["5\n", "4\n", "3\n", "2\n", "1\n"])
+        self.assertIsInstance(results[5], ChildProcessError)
+
+        results = asyncio.run(backquote_many(["echo a", "echo b 1>&2"],
+                                             limit=1, full_result=True))
+        self.assertEqual(results, [("a\n", "", 0), ("", "b\n", 0)])
+
+    def test_timeout(self):
+        self.assertEqual(backquote("echo dorp", timeout=5), "dorp\n")
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired) as cm:
+            backquote("echo dudel; exec sleep 5", timeout=0.3)
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(cm.exception.output, "dudel\n")
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(backquote_async("sleep 5", timeout=0.3))
+
+    def test_large_output(self):
+        # more than a pipe buffer full on both stdout and stderr
+        result = backquote("yes abcdefg | head -n 100000 | tee /dev/stderr",
+                           full_result=True)
+        self.assertEqual(result[0], "abcdefg\n" * 100000)
+        self.assertEqual(result[1], result[0])
+
+    def test_batch(self):
+        commands = ["sleep 0.{}; echo {}".format(n, n) for n in range(5, 0, -1)]
+        start = time.time()
+        results = backquote_batch(commands)
+        self.assertLess(time.time() - start, 1.5)
+        self.assertEqual(results, [("{}\n".format(n), "", 0)
+                                   for n in range(5, 0, -1)])
+        indexes = [index for index, result in backquote_completed(commands)]
+        self.assertEqual(indexes, [4, 3, 2, 1, 0])
+
+    def test_batch_errors(self):
+        commands = ["echo a", "(exit 3)", "sleep 5", "/nonexistent/foo",
+                    "echo b 1>&2"]
+        results = backquote_batch(commands, timeout=0.3, max_workers=2)
+        self.assertEqual(results[0], ("a\n", "", 0))
+        self.assertEqual(results[1], ("", "", 3))
+        self.assertIsInstance(results[2], subprocess.TimeoutExpired)
+        self.assertIsInstance(results[3], FileNotFoundError)
+        self.assertEqual(results[4], ("", "b\n", 0))
+
+        with self.assertRaises(BatchError) as cm:
+            backquote_batch(commands, timeout=0.3, check=True)
+        self.assertEqual(sorted(cm.exception.failures), [1, 2, 3])
+        self.assertEqual(cm.exception.results[0], results[0])
+        self.assertTrue(str(cm.exception).startswith("3 of 5 commands failed"))
+        self.assertEqual(backquote_batch(["echo a"], check=True),
+                         [("a\n", "", 0)])
+
+    def test_lines(self):
+        self.assertEqual(list(backquote_lines("printf 'a\\nbb\\n\\nccc'")),
+                         ["a\n", "bb\n", "\n", "ccc"])
+        self.assertEqual(list(backquote_lines(["echo", "dopp"])), ["dopp\n"])
+        self.assertEqual(list(backquote_lines("true")), [])
+        lines = backquote_lines("seq 1 200000 | tee /dev/stderr",
+                                silent=True)
+        self.assertEqual(sum(map(int, lines)), 200000 * 200001 // 2)
+
+        with self.assertRaises(ChildProcessError):
+            list(backquote_lines("echo doodeedoo; exit 13"))
+        lines = []
+        with self.assertRaises(ChildProcessError):
+            for line in backquote_lines("echo dudu; echo dada 1>&2"):
+                lines.append(line)
+        self.assertEqual(lines, ["dudu\n"])
+        self.assertEqual(list(backquote_lines("echo dudu; exit 1",
+                                              silent=True)), ["dudu\n"])
+
+    def test_lines_early_close(self):
+        start = time.time()
+        lines = backquote_lines("echo one; sleep 5; echo two")
+        self.assertEqual(next(lines), "one\n")
+        lines.close()
+        self.assertLess(time.time() - start, 2)
+
+    def test_binary(self):
+        self.assertEqual(backquote("printf 'a\\377b'", binary=True),
+                         b"a\xffb")
+        self.assertEqual(backquote("echo a; echo b 1>&2", binary=True,
+                                   full_result=True), (b"a\n", b"b\n", 0))
+        self.assertEqual(list(backquote_lines("printf 'a\\nb\\377'",
+                                              binary=True)),
+                         [b"a\n", b"b\xff"])
+        self.assertEqual(asyncio.run(backquote_async("printf 'a\\377b'",
+                                                     binary=True)), b"a\xffb")
+
+    def test_chunk_size(self):
+        # multi-byte characters split between chunks
+        text = "äöü€ß\n" * 1000
+        for chunk_size in (1, 3, 7, None):
+            self.assertEqual(backquote(["printf", "%s", text],
+                                       chunk_size=chunk_size), text)
+            self.assertEqual("".join(backquote_lines(["printf", "%s", text],
+                                                     chunk_size=chunk_size)),
+                             text)
+        with self.assertRaises(UnicodeDecodeError):
+            backquote("printf 'a\\377b'")
+
+    def test_timeout_escalation(self):
+        grace = y.process.kill_grace
+        try:
+            y.process.kill_grace = 0.3
+            start = time.time()
+            with self.assertRaises(subprocess.TimeoutExpired):
+                backquote("trap '' TERM; echo ignoring; sleep 5; echo late",
+                          timeout=0.3)
+            self.assertLess(time.time() - start, 2)
+            with self.assertRaises(subprocess.TimeoutExpired):
+                y.system("trap '' TERM; sleep 5", timeout=0.3)
+            self.assertLess(time.time() - start, 4)
+        finally:
+            y.process.kill_grace = grace
+
+    def test_timeout_grandchildren(self):
+        def alive(pid):
+            try:
+                with open("/proc/{}/stat".format(pid)) as f:
+                    return f.read().split(")")[-1].split()[0] != "Z"
+            except FileNotFoundError:
+                return False
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pidfile = os.path.join(tmpdir, "pid")
+            command = "sleep 30 & echo $! > {}; wait".format(pidfile)
+            for run in (lambda: backquote(command, timeout=0.3),
+                        lambda: y.system(command, timeout=0.3),
+                        lambda: list(y.pipeline([command, "cat"],
+                                                timeout=0.3)),
+                        lambda: asyncio.run(y.backquote_async(command,
+                                                              timeout=0.3))):
+                with self.assertRaises(subprocess.TimeoutExpired):
+                    run()
+                with open(pidfile) as f:
+                    pid = int(f.read())
+                time.sleep(0.1)
+                self.assertFalse(alive(pid))
+
+    def test_timeout_after_eof(self):
+        # the process closes its output, but does not end in time
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            backquote("exec >&- 2>&-; sleep 5", timeout=0.3)
+        self.assertLess(time.time() - start, 2)
+
+    def test_resources(self):
+        out, err, status, usage = backquote(
+            "i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done; echo $i",
+            full_result=True, resources=True)
+        self.assertEqual((out, err, status), ("20000\n", "", 0))
+        self.assertGreater(usage.utime + usage.stime, 0)
+        self.assertGreaterEqual(usage.wall, 0)
+        self.assertGreater(usage.maxrss, 100 * 1024)
+        self.assertEqual(len(backquote("echo a", full_result=True)), 3)
+        self.assertEqual(backquote("echo a", resources=True), "a\n")
+
+        status, usage = y.system("sleep 0.2; exit 3", resources=True)
+        self.assertEqual(status, 3)
+        self.assertGreaterEqual(usage.wall, 0.2)
+        self.assertEqual(y.system("(exit 4)", timeout=5), 4)
+
+    def test_worker(self):
+        with ShellWorker() as worker:
+            self.assertEqual(worker.run("echo a; echo b >&2; printf c; exit 3"),
+                             ("a\nc", "b\n", 3))
+            self.assertEqual(backquote("foo=bar; echo domi$foo",
+                                       worker=worker), "domibar\n")
+            # the state of the worker is not changed by commands
+            self.assertEqual(backquote("echo x$foo", worker=worker), "x\n")
+            self.assertEqual(backquote(["echo", "dami$_"], worker=worker),
+                             "dami$_\n")
+            self.assertEqual(backquote("printf 'a\\377b'", worker=worker,
+                                       binary=True), b"a\xffb")
+            self.assertEqual(backquote("cat", worker=worker), "")
+            with self.assertRaises(ChildProcessError):
+                backquote("echo doodeedoo; exit 13", worker=worker)
+            self.assertEqual(backquote("/nonexistent/foo", worker=worker,
+                                       full_result=True)[2], 127)
+            with self.assertRaises(ValueError):
+                backquote("echo", worker=worker, full_result=True,
+                          resources=True)
+
+    def test_worker_chunk_sizes(self):
+        # the markers may be split across reads anywhere
+        with ShellWorker() as worker:
+            for chunk_size in range(1, 80):
+                self.assertEqual(worker.run("printf x; exit 123", timeout=5,
+                                            chunk_size=chunk_size),
+                                 ("x", "", 123))
+
+    def test_worker_env_cwd(self):
+        with ShellWorker() as worker:
+            worker.run("true")
+            os.environ["_worker_var"] = "it's a $var"
+            cwd = os.getcwd()
+            try:
+                os.chdir("/")
+                self.assertEqual(backquote("echo $_worker_var; pwd",
+                                           worker=worker),
+                                 "it's a $var\n/\n")
+            finally:
+                os.chdir(cwd)
+                del os.environ["_worker_var"]
+            self.assertEqual(backquote("echo x$_worker_var; pwd",
+                                       worker=worker), "x\n" + cwd + "\n")
+
+    def test_worker_env_names(self):
+        os.environ["_worker;echo injected"] = "1"
+        try:
+            with ShellWorker() as worker:
+                worker.run("true")
+                del os.environ["_worker;echo injected"]
+                self.assertEqual(worker.run("echo ran"), ("ran\n", "", 0))
+        finally:
+            os.environ.pop("_worker;echo injected", None)
+
+    def test_worker_failures(self):
+        with ShellWorker() as worker:
+            start = time.time()
+            with self.assertRaises(subprocess.TimeoutExpired) as cm:
+                backquote("echo dudel; sleep 5", worker=worker, timeout=0.3)
+            self.assertLess(time.time() - start, 2)
+            self.assertEqual(cm.exception.output, "dudel\n")
+            self.assertEqual(backquote("echo a", worker=worker), "a\n")
+            with self.assertRaises(ChildProcessError):
+                backquote("kill -9 $$", worker=worker)
+            self.assertEqual(backquote("echo b", worker=worker), "b\n")
+
+    def test_default_worker(self):
+        self.assertIs(shell_worker(), shell_worker())
+        self.assertEqual(backquote("echo a | cat", worker=True), "a\n")
+
+    def test_pipeline(self):
+        self.assertEqual(list(pipeline(["echo b a c", "tr ' ' '\\n'",
+                                        ["sort"]])),
+                         ["a\n", "b\n", "c\n"])
+        self.assertEqual(list(pipeline(["lib/doop"])), ["doop\n"])
+        self.assertEqual(list(pipeline([["tr", "a-z", "A-Z"], "sort -r"],
+                                       input=("x{}\n".format(i)
+                                              for i in range(3)))),
+                         ["X2\n", "X1\n", "X0\n"])
+        self.assertEqual(list(pipeline(["cat"], input="a\nb")), ["a\n", "b"])
+        self.assertEqual(list(pipeline(["cat"], input=b"a\xff\n",
+                                       binary=True)), [b"a\xff\n"])
+        self.assertEqual("".join(pipeline(["seq 1 100000", "tail -n 1"],
+                                          lines=False)), "100000\n")
+        # SIGPIPE for yes is not an error
+        self.assertEqual(list(pipeline(["yes", "head -n 2"])), ["y\n", "y\n"])
+        # more input than fits into the pipes, output read concurrently
+        lines = ("{}\n".format(i) for i in range(200000))
+        self.assertEqual(sum(map(int, pipeline(["cat", "cat"], input=lines))),
+                         200000 * 199999 // 2)
+        with self.assertRaises(ValueError):
+            list(pipeline([]))
+
+    def test_pipeline_errors(self):
+        with self.assertRaises(ChildProcessError):
+            list(pipeline(["echo a", "false", "cat"]))
+        with self.assertRaises(ChildProcessError):
+            list(pipeline(["cat /nonexistent/foo", "cat"]))
+        self.assertEqual(list(pipeline(["echo a", "sh -c 'cat; exit 3'"],
+                                       silent=True)), ["a\n"])
+        with self.assertRaises(FileNotFoundError):
+            list(pipeline(["echo a", "/nonexistent/foo"]))
+
+        def failing_input():
+            yield "a\n"
+            raise KeyError("b")
+        with self.assertRaises(KeyError):
+            list(pipeline(["cat"], input=failing_input()))
+
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            list(pipeline(["sleep 5", "cat"], timeout=0.3))
+        output = pipeline(["yes", "cat"])
+        self.assertEqual(next(output), "y\n")
+        output.close()
+        self.assertLess(time.time() - start, 2)
+
+    def test_prepare_command(self):
+        prepare = y.process._prepare_command
+        self.assertEqual(prepare("echo 'a  b' c\\ d", False),
+                         (["echo", "a  b", "c d"], False))
+        self.assertEqual(backquote("echo 'a  b'", shell=False), "a  b\n")
+        self.assertEqual(prepare("echo a", True), (["/bin/sh", "-c", "echo a"],
+                                                   True))
+        self.assertEqual(prepare("echo a", "/bin/bash"),
+                         (["/bin/bash", "-c", "echo a"], True))
+        args = ("echo", "a|b")
+        self.assertIs(prepare(args, None)[0], args)
+
+        # cached results are not shared with the caller
+        argv = prepare("echo cached", None)[0]
+        argv.append("more")
+        self.assertEqual(prepare("echo cached", None),
+                         (["echo", "cached"], False))
+
+        # a change of shellmeta is respected
+        self.assertFalse(prepare("echo a%b", None)[1])
+        saved = y.process.shellmeta
+        try:
+            y.process.shellmeta = saved + "%"
+            self.assertTrue(prepare("echo a%b", None)[1])
+        finally:
+            y.process.shellmeta = saved
@@ -4,6 +4,11 @@ import jpylib as y
 
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # stackoverflow.com/questions/5909873/how-can-i-pretty-print-ascii-tables-with-python
 # has more examples
 
@@ -642,3 +647,121 @@ row 3 cell 32 cell 33 cell 34""")
             table = y.format_table(data3, "minimal", align="cr*,n,c")
         self.assertEqual(str(context.exception),
                          "more than 2 comma-separated align strings: 'cr*,n,c'")
+
+    def test_stream_like_format(self):
+        table = y.table.Table(template=t_template, align="r*,n*")
+        self.assertEqual(list(table.stream(iter(self.data))),
+                         table.format(self.data).split("\n"))
+
+    def test_stream_lookahead(self):
+        """Later items wider than the lookahead rows widen only their cell."""
+        def rows():
+            yield from data3
+        table = y.table.Table(template=t_template, align="cr*,")
+        lines = list(table.stream(rows(), lookahead=2))
+        self.assertEqual(lines, """\
+.---------------------.
+| * | 10 | 100 | 1000 |
+|=====================|
+| 4 | 40 | 400 | 4000 |
+|---+----+-----+------|
+| 27 | 270 | 2700 | 27000 |
+|---+----+-----+------|
+| 3125 | 31250 | 312500 | 3125000 |
+|---+----+-----+------|
+| 823543 | 8235430 | 82354300 | 823543000 |
+.---------------------.""".split("\n"))
+
+    def test_stream_widths(self):
+        table = y.table.Table(template=t_columns, align="c*,",
+                              widths=[6, 7, 8, 9])
+        self.assertEqual(list(table.stream(iter(data3), lookahead=0)),
+                         y.format_table(data=data3, align="c*,",
+                                        template=t_columns).split("\n"))
+
+    def test_stream_empty(self):
+        table = y.table.Table(template=t_template)
+        self.assertEqual(list(table.stream(iter([]))), [])
+
+    def test_print_table(self):
+        with y.outputCaptured() as (out, err):
+            y.print_table(iter(data3), "box", align="cr*,")
+        self.assertEqual(out.getvalue(),
+                         y.format_table(data3, "box", align="cr*,") + "\n")
+
+    def test_print_table_columns(self):
+        columns = {"a": [1, 22], "b": ["x", "yy"]}
+        with y.outputCaptured() as (out, err):
+            y.print_table(columns=columns)
+        self.assertEqual(out.getvalue(),
+                         y.format_table(columns=columns) + "\n")
+        with y.outputCaptured() as (out, err):
+            y.print_table(columns=[["a", "b"], [1, 22]])
+        self.assertEqual(out.getvalue(),
+                         y.format_table(columns=[["a", "b"], [1, 22]]) + "\n")
+
+    def test_is_numeric(self):
+        """The cell numeric check must agree with y.is_num()."""
+        import decimal
+        for item in [0, -17, 3.5, float("nan"), True, None, "12", " 12 ",
+                     "1_000", "1e3", "inf", "0x10", "", "abc", "١٢",
+                     decimal.Decimal("2.50"), [1], 2**80]:
+            self.assertEqual(y.table._is_numeric(item, str(item)),
+                             y.is_num(str(item)), repr(item))
+
+    def test_cells_stringified_once(self):
+        class Counted:
+            count = 0
+            def __str__(self):
+                Counted.count += 1
+                return "42"
+        data = [["a", "b"], [Counted(), Counted()], [Counted(), "x"]]
+        table = y.format_table(data)
+        self.assertEqual(table, """\
+ a   b
+ 42  42
+ 42  x""")
+        self.assertEqual(Counted.count, 3)
+
+    def test_columns_dict(self):
+        columns = {"*": [4, 27, 3125, 823543],
+                   10: ["40", "270", "31250", "8235430"],
+                   "100": (400, 2700, 312500, 82354300),
+                   "1000": (n * 1000 for n in (4, 27, 3125, 823543))}
+        self.assertEqual(y.format_table(columns=columns, template=t_columns),
+                         y.format_table(data=data3, template=t_columns))
+
+    def test_columns_seq(self):
+        columns = list(zip(*data3))
+        self.assertEqual(y.format_table(columns=columns, template=t_abc,
+                                        align="c*,"),
+                         y.format_table(data=data3, template=t_abc,
+                                        align="c*,"))
+        table = y.table.Table(template=y.table.get_template("box"),
+                              align="cr*,")
+        self.assertEqual(table.format(columns=columns),
+                         y.format_table(data3, "box", align="cr*,"))
+
+    def test_columns_uneven(self):
+        table = y.format_table(columns=[["a", "b", "c"], [1, 22]])
+        self.assertEqual(table, """\
+ a   1
+ b  22
+ c""")
+
+    def test_columns_stream(self):
+        table = y.table.Table(template=t_columns)
+        self.assertEqual(list(table.stream({"a": [1, 2], "b": ["x", "y"]})),
+                         [" a | b", "=======", " 1 | x", " 2 | y"])
+
+    @unittest.skipUnless(numpy, "needs numpy")
+    def test_columns_numpy(self):
+        array = numpy.array([[4, 40, 400], [27, 270, 2700]])
+        data = [[4, 40, 400], [27, 270, 2700]]
+        self.assertEqual(y.format_table(array),
+                         y.format_table(data))
+        self.assertEqual(y.format_table(columns=array.T),
+                         y.format_table(data))
+        self.assertEqual(y.format_table(columns={"n": array[:,0],
+                                                 "x": numpy.array(["a", "b"])}),
+                         y.format_table([["n", "x"], [4, "a"], [27, "b"]]))
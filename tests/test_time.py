@@ -34,3 +34,31 @@ class TimeTestcase(unittest.TestCase):
         self.assertEqual(y.iso_time_ms(self.now), "2020-08-30T11:25:48.567")
 
 
+    def test_cached_formatter(self):
+        fmt = y.CachedTimeFormatter("%Y%m%d:%H%M%S", 3)
+        before = y.isotime_ms(datetime.datetime.now())
+        value = fmt()
+        after = y.isotime_ms(datetime.datetime.now())
+        self.assertRegex(value, r"^\d{8}:\d{6}\.\d{3}$")
+        self.assertTrue(before <= value <= after)
+        self.assertEqual(fmt._cached[1], value[:-4])
+
+    def test_cached_formatter_digits(self):
+        self.assertRegex(y.CachedTimeFormatter("%H:%M:%S")(),
+                         r"^\d\d:\d\d:\d\d$")
+        self.assertRegex(y.CachedTimeFormatter("%S", 9)(), r"^\d\d\.\d{9}$")
+        self.assertRaises(ValueError, y.CachedTimeFormatter, "%S", 10)
+
+    def test_cached_formatter_monotonic(self):
+        fmt = y.CachedTimeFormatter("%Y-%m-%dT%H:%M:%S", 6, monotonic=True)
+        value = fmt()
+        self.assertRegex(value, r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{6}$")
+        delta = datetime.datetime.now() - datetime.datetime.fromisoformat(value)
+        self.assertLess(abs(delta.total_seconds()), 1)
+
+    def test_iso_time_now(self):
+        before = y.iso_time_us(datetime.datetime.now(), sep=" ")
+        value = y.iso_time_us(sep=" ")
+        self.assertTrue(before <= value)
+        self.assertEqual(len(value), len(before))
+        self.assertEqual(len(y.iso_time_ms()), len("2020-08-30T11:25:48.567"))